@@ -0,0 +1,69 @@
+'''Compare terminal backends of the game by bytes and CPU time per frame.
+
+Every backend plays the same seeded game in a pseudo-terminal, without sleeping
+between ticks. The script counts bytes the game writes to the terminal and CPU
+time of the game process.
+
+    python benchmarks/backends.py --ticks 2000 --rows 40 --columns 120
+'''
+
+import argparse
+import fcntl
+import os
+import pty
+import select
+import struct
+import sys
+import termios
+
+
+BACKENDS = ('curses', 'ansi')
+
+
+def run_backend(backend, ticks, seed, rows, columns):
+    '''Play the game in a pseudo-terminal. Return bytes written and CPU seconds used.'''
+
+    pid, master_fd = pty.fork()
+    if pid == 0:
+        os.environ.setdefault('TERM', 'xterm-256color')
+        fcntl.ioctl(sys.stdout.fileno(), termios.TIOCSWINSZ, struct.pack('HHHH', rows, columns, 0, 0))
+        os.execvp(sys.executable, [
+            sys.executable, '-m', 'space_garbage.main', '--backend', backend, '--uncapped',
+            '--ticks', str(ticks), '--seed', str(seed),
+        ])
+
+    output_bytes = 0
+    while True:
+        select.select([master_fd], [], [])
+        try:
+            data = os.read(master_fd, 65536)
+        except OSError:  # the game has exited and closed the terminal
+            break
+        if not data:
+            break
+        output_bytes += len(data)
+
+    _, status, usage = os.wait4(pid, 0)
+    os.close(master_fd)
+    if not os.WIFEXITED(status) or os.WEXITSTATUS(status) != 0:
+        raise RuntimeError(f'{backend} backend exited with status {status}')
+    return output_bytes, usage.ru_utime + usage.ru_stime
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ticks', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--rows', type=int, default=40)
+    parser.add_argument('--columns', type=int, default=120)
+    options = parser.parse_args()
+
+    print(f'{"backend":<10} {"bytes/frame":>12} {"CPU ms/frame":>13}')
+    for backend in BACKENDS:
+        output_bytes, cpu_seconds = run_backend(backend, options.ticks, options.seed, options.rows,
+                                                options.columns)
+        print(f'{backend:<10} {output_bytes / options.ticks:12.1f} {cpu_seconds * 1000 / options.ticks:13.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+'''Micro-benchmarks of the game hot paths.
+
+Run benchmarks and save results, then compare them with a stored baseline:
+
+    python benchmarks/micro.py run --output results.json
+    python benchmarks/micro.py compare benchmarks/baseline.json results.json
+
+Compare exits with status 1, if any benchmark got slower than the threshold.
+'''
+
+import argparse
+import functools
+import json
+import platform
+import random
+import sys
+import timeit
+
+from space_garbage.bullets import BulletSystem
+from space_garbage.common import draw_frame, get_frame_size
+from space_garbage.garbage import duck, hubble, lamp, trash_large, trash_medium, trash_small
+from space_garbage.headless import HeadlessCanvas
+from space_garbage.obstacles import Obstacle, ObstacleGrid, collide_many
+from space_garbage.physics import update_speed, update_speeds
+from space_garbage.render import FrameBuffer
+from space_garbage.scheduler import Scheduler, Sleep
+
+
+OBSTACLES_SCALES = (10, 100, 1000, 10000)
+BULLETS_SCALES = (1, 10, 100, 500)
+BODIES_SCALES = (10, 1000)
+COROUTINES_SCALES = (10, 100, 1000, 10000)
+FIELD_ROWS, FIELD_COLUMNS = 200, 600  # large field, to spread 10000 obstacles
+REPEAT = 5
+DEFAULT_THRESHOLD = 0.25
+GARBAGE_FRAMES = (duck, hubble, lamp, trash_small, trash_medium, trash_large)
+
+
+def _make_obstacles(number, rng):
+    obstacles = ObstacleGrid()
+    for _ in range(number):
+        frame = rng.choice(GARBAGE_FRAMES)
+        obstacle = Obstacle(rng.randrange(FIELD_ROWS), rng.randrange(FIELD_COLUMNS), frame.rows,
+                            frame.columns, mask=frame.mask)
+        obstacles.add(obstacle)
+    return obstacles
+
+
+def bench_draw_frame():
+    screen = FrameBuffer(HeadlessCanvas(40, 120))
+
+    def run():
+        draw_frame(screen, 10, 30, hubble)
+        draw_frame(screen, 10, 30, hubble, negative=True)
+    yield 'draw_frame/hubble', run
+
+
+def bench_get_frame_size():
+    yield 'get_frame_size/hubble', lambda: get_frame_size(hubble)
+
+
+def bench_has_collision():
+    obstacle = Obstacle(10, 10, hubble.rows, hubble.columns, mask=hubble.mask)
+    yield 'Obstacle.has_collision/box', lambda: obstacle.has_collision(12, 15, 3, 3)
+
+
+def bench_obstacles_query():
+    for number in OBSTACLES_SCALES:
+        rng = random.Random(number)
+        obstacles = _make_obstacles(number, rng)
+        points = [(rng.uniform(0, FIELD_ROWS), rng.uniform(0, FIELD_COLUMNS)) for _ in range(100)]
+
+        def run(obstacles=obstacles, points=points):
+            for row, column in points:
+                obstacles.query_rect(row, column, 9, 5)
+        yield f'ObstacleGrid.query_rect/x100/{number}_obstacles', run
+
+
+def bench_collide_many():
+    for number in OBSTACLES_SCALES:
+        rng = random.Random(number)
+        boxes = [obstacle.box for obstacle in _make_obstacles(number, rng)]
+        queries = [(rng.uniform(0, FIELD_ROWS), rng.uniform(0, FIELD_COLUMNS), 1, 1) for _ in range(10)]
+        yield f'collide_many/10_queries/{number}_obstacles', lambda boxes=boxes, queries=queries: \
+            collide_many(queries, boxes)
+
+
+def bench_bullets_update():
+    for number in BULLETS_SCALES:
+        rng = random.Random(number)
+        obstacles = _make_obstacles(1000, rng)
+        canvas = FrameBuffer(HeadlessCanvas(FIELD_ROWS, FIELD_COLUMNS))
+        bullets = BulletSystem()
+
+        def run(bullets=bullets, obstacles=obstacles, canvas=canvas, number=number, rng=rng):
+            while len(bullets) < number:
+                bullets.spawn(rng.uniform(FIELD_ROWS / 2, FIELD_ROWS - 2),
+                              rng.uniform(1, FIELD_COLUMNS - 2), rows_speed=-1)
+            bullets.update(canvas, obstacles)
+        yield f'BulletSystem.update/{number}_bullets/1000_obstacles', run
+
+
+def bench_update_speed():
+    yield 'update_speed', lambda: update_speed(1.2, -0.7, 1, -1)
+
+
+def bench_update_speeds():
+    for number in BODIES_SCALES:
+        rng = random.Random(number)
+        row_speeds = [rng.uniform(-2, 2) for _ in range(number)]
+        column_speeds = [rng.uniform(-2, 2) for _ in range(number)]
+        rows_directions = [rng.choice((-1, 0, 1)) for _ in range(number)]
+        columns_directions = [rng.choice((-1, 0, 1)) for _ in range(number)]
+        yield f'update_speeds/{number}_bodies', functools.partial(
+            update_speeds, row_speeds, column_speeds, rows_directions, columns_directions)
+
+
+async def _idle(ticks):
+    while True:
+        await Sleep(ticks)
+
+
+def bench_scheduler_dispatch():
+    for number in COROUTINES_SCALES:
+        scheduler = Scheduler()
+        for index in range(number):
+            scheduler.spawn(_idle(1 + index % 20))
+        yield f'Scheduler.run_tick/{number}_coroutines', scheduler.run_tick
+        scheduler.close()
+
+
+BENCHMARKS = (
+    bench_draw_frame,
+    bench_get_frame_size,
+    bench_has_collision,
+    bench_obstacles_query,
+    bench_collide_many,
+    bench_bullets_update,
+    bench_update_speed,
+    bench_update_speeds,
+    bench_scheduler_dispatch,
+)
+
+
+def measure(function, repeat=REPEAT):
+    '''Return the best time of a single call in seconds.'''
+
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run(options):
+    results = {}
+    for benchmark in BENCHMARKS:
+        for name, function in benchmark():
+            if options.filter and options.filter not in name:
+                continue
+            results[name] = measure(function)
+            print(f'{name:<55} {results[name] * 1_000_000:12.3f} us', flush=True)
+
+    report = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(options.output, 'w') as output_file:
+        json.dump(report, output_file, indent=2, sort_keys=True)
+
+
+def compare(options):
+    with open(options.baseline) as baseline_file:
+        baseline = json.load(baseline_file)['results']
+    with open(options.results) as results_file:
+        results = json.load(results_file)['results']
+
+    regressions = []
+    for name in sorted(baseline.keys() & results.keys()):
+        ratio = results[name] / baseline[name]
+        flag = ''
+        if ratio > 1 + options.threshold:
+            regressions.append(name)
+            flag = 'REGRESSION'
+        print(f'{name:<55} {baseline[name] * 1_000_000:12.3f} us {results[name] * 1_000_000:12.3f} us '
+              f'{ratio:6.2f}x {flag}')
+
+    for name in sorted(baseline.keys() ^ results.keys()):
+        print(f'{name:<55} is missing in {"results" if name in baseline else "baseline"}')
+
+    if regressions:
+        print(f'{len(regressions)} benchmarks are slower than baseline by more than {options.threshold:.0%}')
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='run benchmarks and save results to JSON')
+    run_parser.add_argument('--output', default='benchmark_results.json')
+    run_parser.add_argument('--filter', help='run only benchmarks with names containing given text')
+
+    compare_parser = subparsers.add_parser('compare', help='compare results with a baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('results')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help=f'allowed slowdown, {DEFAULT_THRESHOLD} means 25%% by default')
+
+    options = parser.parse_args()
+    if options.command == 'run':
+        run(options)
+        return 0
+    return compare(options)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -16,6 +16,8 @@ setup(
     entry_points={
         "console_scripts": [
             "play-space-garbage = space_garbage.main:main",
+            "watch-space-garbage = space_garbage.spectator:main",
+            "tune-space-garbage = space_garbage.batch:main",
         ],
     },
     python_requires='>=3.7',
@@ -1,37 +1,57 @@
 '''Async funcs for frames animation.'''
 
-import asyncio
 import curses
 import random
 
-from space_garbage.common import (
-    draw_frame,
-    get_frame_size,
-    get_garbage_delay_tics,
-    read_controls,
-)
-from space_garbage.obstacles import Obstacle
-from space_garbage.garbage import duck, hubble, lamp, trash_small, trash_medium, trash_large
+from space_garbage.bullets import BulletSystem
+from space_garbage.common import IDLE_CONTROLS, draw_frame, get_frame_size
+from space_garbage.obstacles import Obstacle, ObstacleGrid
 from space_garbage.physics import update_speed
 from space_garbage.rocket import rocket_frame_1, rocket_frame_2
+from space_garbage.scheduler import Sleep
 from space_garbage.explosion import explosion_frames
-from space_garbage.text import game_over, PHRASES
+from space_garbage.governor import (
+    FREEZE_FLAME_LEVEL,
+    FREEZE_STARS_LEVEL,
+    RARE_HUD_LEVEL,
+    SHORT_EXPLOSIONS_LEVEL,
+)
+from space_garbage.text import game_over
+from space_garbage.timeline import Timeline, get_default_rows
 
 
 BULLET_SPEED = -1  # less is faster
 GARBAGE_FALLING_SPEED = 5
 GARBAGE_GENERATION_SPEED = 30
 SECONDS_PER_YEAR = 1.5
+FAR_UPDATE_STEPS = 4  # garbage out of the camera sight moves by that many steps at once
+RARE_HUD_TICKS = 10
 
 class AnimationHandler:
 
-    def __init__(self, canvas, border_size, coroutines):
-        self.obstacles = []
-        self.obstacles_in_last_collisions = []
-        self.canvas = canvas
-        self.coroutines = coroutines
+    def __init__(self, canvas, border_size, scheduler, sound=curses.beep, rng=random, timeline=None,
+                 hud=None, camera=None, governor=None):
+        self.obstacles = ObstacleGrid()
+        self.bullets = BulletSystem()
+        self.canvas = canvas  # the world
+        self.hud = hud or canvas  # the screen, captions are drawn there
+        self.camera = camera
+        self.governor = governor
+        self.garbage_per_spawn = 1
+        # difficulty settings
+        self.garbage_delay_scale = 1
+        self.garbage_falling_speed = GARBAGE_FALLING_SPEED
+        self.ship_physics = {}  # keyword arguments of update_speed
+        self.game_over_year = None
+        self.scheduler = scheduler
         self.year = 1957
         self.border_size = border_size
+        self.sound = sound
+        self.rng = rng
+        self.controls = IDLE_CONTROLS
+        self.ship_box = None  # row, column, rows_size, columns_size of the spaceship, while it flies
+        self.ship_speed = (0, 0)
+        self.timeline = timeline or Timeline(get_default_rows())
 
     async def increase_year(self, ticks_in_second):
         '''Increases year inside the game.'''
@@ -43,24 +63,27 @@ class AnimationHandler:
     async def animate_year(self, window_rows, window_columns):
         '''Displays year in the corner of the screen.'''
 
-        derwin = self.canvas.derwin(
+        derwin = self.hud.derwin(
             window_rows - self.border_size*3,
             self.border_size*2,
         )
 
-        text = f'Year: {self.year}'
+        caption, level = self.timeline.get(self.year).caption, self.detail_level
+        text = caption
 
         while True:
             draw_frame(derwin, 1, 1, text, negative=True)
 
-            text = f'Year: {self.year}'
-            phrase = PHRASES.get(self.year)
-            if phrase is not None:
-                text += f', {phrase}'
+            year_caption = self.timeline.get(self.year).caption
+            if (year_caption, self.detail_level) != (caption, level):
+                caption, level = year_caption, self.detail_level
+                text = caption
+                if level:
+                    text += f' [detail -{level}: {self.governor.level_name}]'
 
             draw_frame(derwin, 1, 1, text)
 
-            await self.sleep(tics=1)
+            await self.sleep(tics=RARE_HUD_TICKS if level >= RARE_HUD_LEVEL else 1)
 
     async def animate_spaceship(self, window_rows, window_columns, step_size):
         '''Displays spaceship animation.'''
@@ -75,6 +98,7 @@ class AnimationHandler:
 
         iteration = 0
         row_speed = column_speed = 0
+        self.ship_box = (start_row, start_column, frame_rows, frame_columns)
         while True:
             draw_frame(self.canvas, start_row, start_column, current_frame)
 
@@ -83,88 +107,65 @@ class AnimationHandler:
 
             draw_frame(self.canvas, start_row, start_column, current_frame, negative=True)
 
-            rows_direction, columns_direction, space_pressed = read_controls(self.canvas)
+            rows_direction, columns_direction, space_pressed = self.controls
 
             if space_pressed:
                 frame_center_column = start_column + frame_columns // 2
-                self.coroutines.append(self.fire(start_row, frame_center_column, rows_speed=BULLET_SPEED))
+                self.bullets.spawn(start_row, frame_center_column, rows_speed=BULLET_SPEED)
 
             row_speed, column_speed = update_speed(row_speed, column_speed, rows_direction,
-                                                columns_direction)
+                                                columns_direction, **self.ship_physics)
             start_row = (start_row + row_speed) % window_rows
             start_column = (start_column + column_speed) % window_columns
+            if self.camera is not None:
+                self.camera.follow(start_row + frame_rows / 2, start_column + frame_columns / 2)
 
-            if iteration % flame_animation_speed == 0:
+            if iteration % flame_animation_speed == 0 and self.detail_level < FREEZE_FLAME_LEVEL:
                 current_frame, next_frame = next_frame, current_frame
 
             frame_rows, frame_columns = get_frame_size(current_frame)
-            for obstacle in self.obstacles:
-                if obstacle.has_collision(start_row, start_column, frame_rows, frame_columns):
-                    self.coroutines.append(self.show_gameover())
-                    return
-
-    async def blink(self, row, column, symbol='*'):
-        '''Displays animation of a star.'''
+            self.ship_box = (start_row, start_column, frame_rows, frame_columns)
+            self.ship_speed = (row_speed, column_speed)
+            if self.obstacles.query_rect(start_row, start_column, frame_rows, frame_columns,
+                                         mask=current_frame.mask):
+                self.ship_box = None
+                self.game_over_year = self.year
+                self.scheduler.spawn(self.show_gameover())
+                return
+
+    async def animate_stars(self, starfield):
+        '''Displays blinking stars of the background.'''
 
         while True:
-            self.canvas.addstr(row, column, symbol, curses.A_DIM)
-            await self.sleep(random.randint(10, 20))
-
-            self.canvas.addstr(row, column, symbol)
-            await self.sleep(random.randint(3, 6))
-
-            self.canvas.addstr(row, column, symbol, curses.A_BOLD)
-            await self.sleep(random.randint(5, 10))
-
-            self.canvas.addstr(row, column, symbol)
-            await self.sleep(random.randint(3, 6))
-
-    async def fire(self, start_row, start_column, rows_speed=-0.3, columns_speed=0):
-        '''Displays animation of gun shot, direction and speed can be specified.'''
-
-        row, column = start_row, start_column
-
-        self.canvas.addstr(round(row), round(column), '*')
-        await self.sleep()
-
-        self.canvas.addstr(round(row), round(column), 'O')
-        await self.sleep()
-        self.canvas.addstr(round(row), round(column), ' ')
-
-        row += rows_speed
-        column += columns_speed
-
-        symbol = '-' if columns_speed else '|'
-
-        rows, columns = self.canvas.getmaxyx()  # getmaxyx returns heigh and width of window
-        max_row, max_column = rows - 1, columns - 1
-
-        curses.beep()
-
-        while 0 < row < max_row and 0 < column < max_column:
+            if self.detail_level < FREEZE_STARS_LEVEL:
+                starfield.update(self.canvas)
+            await self.sleep()
 
-            for obstacle in self.obstacles:
-                if obstacle.has_collision(row, column):
-                    self.obstacles_in_last_collisions.append(obstacle)
-                    return
+    async def animate_bullets(self):
+        '''Displays flying bullets and registers obstacles they hit.'''
 
-            self.canvas.addstr(round(row), round(column), symbol)
+        while True:
+            for obstacle in self.bullets.update(self.canvas, self.obstacles):
+                obstacle.hit = True
+            if self.bullets.launched:
+                self.beep()
             await self.sleep()
-            self.canvas.addstr(round(row), round(column), ' ')
-            row += rows_speed
-            column += columns_speed
 
     async def fill_orbit_with_garbage(self, window_columns):
         '''Endlessly starts animating flying peace of garbage.'''
 
         while True:
-            garbage_delay_ticks = get_garbage_delay_tics(self.year)
+            year_entry = self.timeline.get(self.year)
+            garbage_delay_ticks = year_entry.garbage_delay_ticks
+            if garbage_delay_ticks is not None:
+                garbage_delay_ticks = max(1, round(garbage_delay_ticks * self.garbage_delay_scale))
             if garbage_delay_ticks is None:
                 await self.sleep(tics=1)
             else:
-                random_frame = random.choice([duck, hubble, lamp, trash_small, trash_medium, trash_large])
-                random_column = random.randint(self.border_size, window_columns-2*self.border_size)
-                self.coroutines.append(self.fly_garbage(random_column, random_frame))
+                for _ in range(self.garbage_per_spawn):
+                    random_frame = year_entry.choose_sprite(self.rng)
+                    random_column = self.rng.randint(self.border_size, window_columns-2*self.border_size)
+                    self.scheduler.spawn(self.fly_garbage(random_column, random_frame))
                 await self.sleep(tics=garbage_delay_ticks)
 
     async def fly_garbage(self, column, garbage_frame, speed=1):
@@ -180,26 +181,31 @@ class AnimationHandler:
         row = 0
 
         frame_rows, frame_columns = get_frame_size(garbage_frame)
+        obstacle = Obstacle(row, column, frame_rows, frame_columns, mask=garbage_frame.mask)
+        self.obstacles.add(obstacle)
 
         while row < rows_number:
-            obstacle = Obstacle(row, column, frame_rows, frame_columns)
-            self.obstacles.append(obstacle)
-
-            draw_frame(self.canvas, row, column, garbage_frame)
+            self.obstacles.move(obstacle, row, column)
 
-            await self.sleep(tics=GARBAGE_FALLING_SPEED)
-
-            draw_frame(self.canvas, row, column, garbage_frame, negative=True)
-
-            self.obstacles.remove(obstacle)
+            steps = 1
+            if self.is_near(row, column):
+                draw_frame(self.canvas, row, column, garbage_frame)
+                await self.sleep(tics=self.garbage_falling_speed)
+                draw_frame(self.canvas, row, column, garbage_frame, negative=True)
+            else:
+                steps = FAR_UPDATE_STEPS
+                await self.sleep(tics=self.garbage_falling_speed * steps)
 
-            if obstacle in self.obstacles_in_last_collisions:
+            if obstacle.hit:
+                self.obstacles.remove(obstacle)
                 shift_for_better_alignment = 2
                 await self.explode(row+frame_rows/2+shift_for_better_alignment,
                                    column+frame_columns/2-shift_for_better_alignment)
-                break
+                return
 
-            row += speed
+            row += speed * steps
+
+        self.obstacles.remove(obstacle)
 
     async def explode(self, center_row, center_column):
         '''Draws explode animation.'''
@@ -208,30 +214,50 @@ class AnimationHandler:
         corner_row = center_row - rows / 2
         corner_column = center_column - columns / 2
 
-        curses.beep()
+        self.beep()
 
-        for frame in explosion_frames:
+        frames = explosion_frames
+        if self.detail_level >= SHORT_EXPLOSIONS_LEVEL:
+            frames = explosion_frames[::2]
+        for frame in frames:
             draw_frame(self.canvas, corner_row, corner_column, frame)
             await self.sleep()
             draw_frame(self.canvas, corner_row, corner_column, frame, negative=True)
             await self.sleep()
 
+    @property
+    def detail_level(self):
+        '''How much detail the load governor has taken away, 0 is full detail.'''
+
+        return 0 if self.governor is None else self.governor.level
+
+    def is_near(self, row, column):
+        '''Check if the world position is close enough to the camera to animate it in detail.'''
+
+        return self.camera is None or self.camera.is_near(row, column)
+
+    def beep(self):
+        '''Beeps with sound function, unless the game runs without sound.'''
+
+        if self.sound is not None:
+            self.sound()
+
     async def sleep(self, tics=1):
         '''Pauses async func for given number of tics.'''
 
-        for _ in range(tics):
-            await asyncio.sleep(0)
+        if tics > 0:
+            await Sleep(tics)
 
     async def show_gameover(self):
         '''Shows "GameOver" in the middle of the screen.'''
 
         while True:
-            rows_number, columns_number = self.canvas.getmaxyx()
+            rows_number, columns_number = self.hud.getmaxyx()
             frame_rows, frame_columns = get_frame_size(game_over)
 
             start_row = (rows_number - frame_rows) / 2
             start_column = (columns_number - frame_columns) / 2
 
-            draw_frame(self.canvas, start_row, start_column, game_over)
+            draw_frame(self.hud, start_row, start_column, game_over)
 
             await self.sleep()
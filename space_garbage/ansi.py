@@ -0,0 +1,124 @@
+'''Terminal backend, that writes ANSI escape sequences directly, without curses.'''
+
+import curses
+import os
+import select
+import sys
+import termios
+import tty
+
+from space_garbage.common import DOWN_KEY_CODE, LEFT_KEY_CODE, RIGHT_KEY_CODE, UP_KEY_CODE
+from space_garbage.render import WindowBase
+
+
+RESET_ATTR = b'\x1b[0m'
+ATTR_CODES = {
+    curses.A_NORMAL: RESET_ATTR,
+    curses.A_DIM: RESET_ATTR + b'\x1b[2m',
+    curses.A_BOLD: RESET_ATTR + b'\x1b[1m',
+}
+KEY_SEQUENCES = {
+    b'\x1b[A': UP_KEY_CODE,
+    b'\x1b[B': DOWN_KEY_CODE,
+    b'\x1b[C': RIGHT_KEY_CODE,
+    b'\x1b[D': LEFT_KEY_CODE,
+    b'\x1bOA': UP_KEY_CODE,
+    b'\x1bOB': DOWN_KEY_CODE,
+    b'\x1bOC': RIGHT_KEY_CODE,
+    b'\x1bOD': LEFT_KEY_CODE,
+}
+# alternate screen, hidden cursor, no line wrapping, clear screen
+ENTER_SEQUENCE = b'\x1b[?1049h\x1b[?25l\x1b[?7l\x1b[2J'
+EXIT_SEQUENCE = b'\x1b[0m\x1b[?7h\x1b[?25h\x1b[?1049l'
+
+
+class AnsiTerminal(WindowBase):
+    '''Terminal window, that is drawn with ANSI escape sequences instead of curses.
+
+    Every draw call appends cursor moves and symbols to a byte buffer, and refresh()
+    sends the whole frame to the terminal with a single os.write(). Use it as a
+    context manager, to switch the terminal into game mode and back.
+    '''
+
+    def __init__(self, input_fd=None, output_fd=None):
+        self.input_fd = sys.stdin.fileno() if input_fd is None else input_fd
+        self.output_fd = sys.stdout.fileno() if output_fd is None else output_fd
+        self.columns, self.rows = os.get_terminal_size(self.output_fd)
+        self.non_blocking = False
+
+        self.frames = 0
+        self.bytes_written = 0
+
+        self._buffer = bytearray()
+        self._attr = None
+        self._input = b''
+        self._saved_tty_attrs = None
+
+    def __enter__(self):
+        self._saved_tty_attrs = termios.tcgetattr(self.input_fd)
+        tty.setcbreak(self.input_fd)
+        self._write(ENTER_SEQUENCE)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._write(EXIT_SEQUENCE)
+        termios.tcsetattr(self.input_fd, termios.TCSADRAIN, self._saved_tty_attrs)
+
+    def fileno(self):
+        return self.input_fd
+
+    def border(self):
+        horizontal = '+' + '-' * (self.columns - 2) + '+'
+        self.addstr(0, 0, horizontal)
+        self.addstr(self.rows - 1, 0, horizontal)
+        for row in range(1, self.rows - 1):
+            self.addstr(row, 0, '|')
+            self.addstr(row, self.columns - 1, '|')
+
+    def nodelay(self, flag):
+        self.non_blocking = flag
+
+    def getch(self):
+        '''Return code of a pressed key, arrows are decoded to curses key codes. -1 if none.'''
+
+        if not self._input:
+            timeout = 0 if self.non_blocking else None
+            if not select.select([self.input_fd], [], [], timeout)[0]:
+                return -1
+            self._input = os.read(self.input_fd, 1024)
+
+        for sequence, key_code in KEY_SEQUENCES.items():
+            if self._input.startswith(sequence):
+                self._input = self._input[len(sequence):]
+                return key_code
+
+        key_code, self._input = self._input[0], self._input[1:]
+        return key_code
+
+    def beep(self):
+        self._buffer += b'\a'
+
+    def refresh(self):
+        '''Send the frame to the terminal.'''
+
+        if not self._buffer:
+            return
+
+        self._write(self._buffer)
+        self.frames += 1
+        self._buffer = bytearray()
+
+    def _put_text(self, row, column, text, attr):
+        buffer = self._buffer
+        buffer += b'\x1b[%d;%dH' % (row + 1, column + 1)
+        if attr != self._attr:
+            buffer += ATTR_CODES.get(attr, RESET_ATTR)
+            self._attr = attr
+        buffer += text.encode()
+
+    def _write(self, data):
+        view = memoryview(data)
+        while view:
+            written = os.write(self.output_fd, view)
+            self.bytes_written += written
+            view = view[written:]
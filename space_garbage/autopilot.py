@@ -0,0 +1,145 @@
+'''Bot, that plays the game instead of a human, for long test runs.'''
+
+from space_garbage.common import IDLE_CONTROLS
+
+
+LOOKAHEAD_ROWS = 12  # rows above the spaceship, where garbage is a threat
+DODGE_MARGIN = 3  # columns at each side of the spaceship, where garbage is a threat
+HOME_ROW_SHARE = 0.75  # the spaceship keeps to that part of the field height
+HOME_ROW_TOLERANCE = 2
+STEER_TOLERANCE = 1.5  # columns, the spaceship may stop off its target, a single push moves it about 3
+DEFAULT_FADING = 0.8  # fading of update_speed
+
+
+class Autopilot:
+    '''Controller, that flies the spaceship of the animation handler.
+
+    Called once per tick, it returns the same controls tuple as read_controls().
+    It shoots, when a bullet would hit garbage straight above the gun. When
+    garbage comes down on the spaceship, it picks the nearest column free of
+    garbage above, that can be reached without hitting garbage at the sides, and
+    keeps to it while it stays safe. With no such column it puts the gun under
+    the garbage, that is the farthest, to shoot it down. The spaceship drifts
+    with its speed, so the autopilot steers by the column where the spaceship
+    would stop, rather than where it is. Garbage is taken from a couple of
+    queries of the obstacle grid around the spaceship per tick, so it costs the
+    same with any number of obstacles in the field.
+    '''
+
+    def __init__(self, handler, field_rows, field_columns):
+        self.handler = handler
+        self.home_row = field_rows * HOME_ROW_SHARE
+        self.field_columns = field_columns
+        self.target_column = None
+
+    def __call__(self):
+        ship_box = self.handler.ship_box
+        if ship_box is None:
+            self.target_column = None
+            return IDLE_CONTROLS
+
+        row, column, rows_size, columns_size = ship_box
+        obstacles = self.handler.obstacles
+        gun_column = column + columns_size // 2
+        rows_above = max(round(row), 1)
+        space_pressed = bool(obstacles.query_rect(0, gun_column, rows_above, 1, mask=(1,) * rows_above))
+
+        band = obstacles.query_rect(row - LOOKAHEAD_ROWS, 0, LOOKAHEAD_ROWS + rows_size, self.field_columns)
+        target_column = self.target_column
+        if target_column is None or self._get_threat(band, ship_box, target_column) is not None or \
+                self._is_blocked(band, ship_box, target_column):
+            self.target_column = self._find_target_column(band, ship_box)
+
+        rows_direction = 0
+        if row < self.home_row - HOME_ROW_TOLERANCE:
+            rows_direction = 1
+        elif row > self.home_row + HOME_ROW_TOLERANCE:
+            rows_direction = -1
+
+        return rows_direction, self._steer(column, self.target_column), space_pressed
+
+    def _find_target_column(self, band, ship_box):
+        '''Return the nearest safe column, that can be reached, or the column to shoot the farthest threat from.'''
+
+        row, column, _, columns_size = ship_box
+        last_column = self.field_columns - columns_size - 1
+        best_column, best_threat, best_score = column, None, None
+        for step in (-1, 1):
+            candidate = column
+            while 1 <= candidate <= last_column and not self._is_blocked(band, ship_box, candidate):
+                threat = self._get_threat(band, ship_box, candidate)
+                if threat is None:
+                    clearance = LOOKAHEAD_ROWS + 1
+                else:
+                    clearance = row - threat.row - threat.rows_size
+                score = (clearance, -abs(candidate - column))
+                if best_score is None or score > best_score:
+                    best_column, best_threat, best_score = candidate, threat, score
+                if threat is None:
+                    break
+                candidate += step
+
+        if best_threat is None:
+            return best_column
+        aim_column = best_threat.column + best_threat.columns_size // 2 - columns_size // 2
+        if 1 <= aim_column <= last_column and not self._is_blocked(band, ship_box, aim_column):
+            return aim_column
+        return best_column
+
+    @staticmethod
+    def _get_threat(band, ship_box, column):
+        '''Return the lowest garbage, that would fall on the spaceship at the column, None if there is none.
+
+        Garbage level with the spaceship is a threat, only if it is in the place
+        of the spaceship, give or take the steering tolerance, and not in the
+        margin around it.
+        '''
+
+        row, _, _, columns_size = ship_box
+        first_column, last_column = column - DODGE_MARGIN, column + columns_size + DODGE_MARGIN
+        lowest = None
+        for obstacle in band:
+            obstacle_end = obstacle.column + obstacle.columns_size
+            if obstacle.column >= last_column or obstacle_end <= first_column:
+                continue
+            if obstacle.row + obstacle.rows_size > row and (
+                    obstacle.column >= column + columns_size + STEER_TOLERANCE or
+                    obstacle_end <= column - STEER_TOLERANCE):
+                continue
+            if lowest is None or obstacle.row + obstacle.rows_size > lowest.row + lowest.rows_size:
+                lowest = obstacle
+        return lowest
+
+    @staticmethod
+    def _is_blocked(band, ship_box, column):
+        '''Check if garbage level with the spaceship is in the way to the column.
+
+        Only columns the spaceship would sweep through are checked, garbage may
+        touch the box of the spaceship where it is without hitting it.
+        '''
+
+        row, ship_column, rows_size, columns_size = ship_box
+        if column == ship_column:
+            return False
+        if column < ship_column:
+            first_column, last_column = column, ship_column
+        else:
+            first_column, last_column = ship_column + columns_size, column + columns_size
+        return any(
+            obstacle.row + obstacle.rows_size > row and obstacle.row < row + rows_size and
+            obstacle.column < last_column and obstacle.column + obstacle.columns_size > first_column
+            for obstacle in band
+        )
+
+    def _steer(self, column, target_column):
+        '''Return columns direction, that brings the spaceship to a stop at the target column.'''
+
+        column_speed = self.handler.ship_speed[1]
+        fading = self.handler.ship_physics.get('fading', DEFAULT_FADING)
+        # with no force the speed fades every tick, the spaceship slides that far before it stops
+        stop_column = column + column_speed * fading / (1 - fading) if fading < 1 else column
+        if target_column - stop_column > STEER_TOLERANCE:
+            return 1
+        if stop_column - target_column > STEER_TOLERANCE:
+            return -1
+        return 0
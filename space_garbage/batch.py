@@ -0,0 +1,210 @@
+'''Batch simulator, that plays many seeded games without rendering to tune the difficulty curve.'''
+
+import argparse
+import concurrent.futures
+import csv
+import itertools
+import random
+import statistics
+import sys
+import time
+
+from space_garbage.animation import GARBAGE_FALLING_SPEED
+from space_garbage.autopilot import Autopilot
+from space_garbage.headless import DEFAULT_COLUMNS, DEFAULT_ROWS, HeadlessCanvas
+from space_garbage.main import BACKGROUND_STARS_NUM, start_game
+from space_garbage.scheduler import Scheduler
+
+
+MAX_TICKS = 20000
+PILOTS = ('autopilot', 'random')
+RANDOM_PILOT_FIRE_CHANCE = 0.3
+# difficulty settings, one configuration is a value of each
+SETTINGS = (
+    ('delay_scale', float, 1.0),  # multiplies garbage delays of the timeline
+    ('falling_speed', int, GARBAGE_FALLING_SPEED),  # ticks between garbage steps
+    ('row_speed_limit', float, 2.0),
+    ('column_speed_limit', float, 2.0),
+    ('fading', float, 0.8),
+)
+RESULT_COLUMNS = (
+    'games', 'survived', 'mean_survival_year', 'median_survival_year', 'min_survival_year',
+    'max_survival_year', 'mean_peak_entities', 'max_peak_entities', 'mean_tick_us',
+)
+
+
+class RandomPilot:
+    '''Controller, that mashes random keys, a floor for the autopilot results.'''
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def __call__(self):
+        rng = self.rng
+        return rng.randint(-1, 1), rng.randint(-1, 1), rng.random() < RANDOM_PILOT_FIRE_CHANCE
+
+
+def play_game(config, seed, pilot='autopilot', max_ticks=MAX_TICKS, rows=DEFAULT_ROWS, columns=DEFAULT_COLUMNS,
+              stars=BACKGROUND_STARS_NUM):
+    '''Play a game with the difficulty config until the game over or max_ticks.
+
+    The game is set up as in play-space-garbage, with stars, as they take random
+    numbers too, so with default settings a seed plays the same game as
+    play-space-garbage --headless --autopilot --seed does. Return a dict with
+    the survival year, the peak number of obstacles and bullets and the mean
+    tick cost in seconds.
+    '''
+
+    canvas = HeadlessCanvas(rows, columns)
+    scheduler = Scheduler()
+    animation_handler, _ = start_game(scheduler, canvas, canvas, seed, stars)
+    animation_handler.garbage_delay_scale = config['delay_scale']
+    animation_handler.garbage_falling_speed = config['falling_speed']
+    animation_handler.ship_physics = {
+        'row_speed_limit': config['row_speed_limit'],
+        'column_speed_limit': config['column_speed_limit'],
+        'fading': config['fading'],
+    }
+    if pilot == 'autopilot':
+        controller = Autopilot(animation_handler, rows, columns)
+    else:
+        controller = RandomPilot(random.Random(seed ^ 0x5eed))
+
+    obstacles, bullets = animation_handler.obstacles, animation_handler.bullets
+    peak_entities = 0
+    ticks = 0
+    started_at = time.perf_counter()
+    try:
+        while ticks < max_ticks and animation_handler.game_over_year is None:
+            animation_handler.controls = controller()
+            scheduler.run_tick()
+            ticks += 1
+            peak_entities = max(peak_entities, len(obstacles) + len(bullets))
+    finally:
+        elapsed = time.perf_counter() - started_at
+        scheduler.close()
+
+    return {
+        'survived': animation_handler.game_over_year is None,
+        'survival_year': animation_handler.game_over_year or animation_handler.year,
+        'peak_entities': peak_entities,
+        'tick_cost': elapsed / ticks if ticks else 0.0,
+    }
+
+
+def _play_job(job):
+    config_index, config, seed, pilot, max_ticks = job
+    return config_index, play_game(config, seed, pilot, max_ticks)
+
+
+def get_configs(options):
+    '''Return every combination of setting values given in options.'''
+
+    names = [name for name, _, _ in SETTINGS]
+    values = [getattr(options, name) for name in names]
+    return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+
+
+def summarize(results):
+    '''Aggregate results of games played with the same config.'''
+
+    years = [result['survival_year'] for result in results]
+    peaks = [result['peak_entities'] for result in results]
+    return {
+        'games': len(results),
+        'survived': sum(result['survived'] for result in results),
+        'mean_survival_year': round(statistics.mean(years), 1),
+        'median_survival_year': statistics.median(years),
+        'min_survival_year': min(years),
+        'max_survival_year': max(years),
+        'mean_peak_entities': round(statistics.mean(peaks), 1),
+        'max_peak_entities': max(peaks),
+        'mean_tick_us': round(statistics.mean(result['tick_cost'] for result in results) * 1e6, 1),
+    }
+
+
+def run_batch(configs, seeds, pilot='autopilot', max_ticks=MAX_TICKS, workers=None, progress=None):
+    '''Play every config with every seed in a pool of processes, return a summary per config.'''
+
+    jobs = [
+        (config_index, config, seed, pilot, max_ticks)
+        for config_index, config in enumerate(configs)
+        for seed in seeds
+    ]
+    results = [[] for _ in configs]
+    # games are short, so jobs go to workers in chunks to save on the round trips
+    chunksize = max(1, len(jobs) // ((workers or 4) * 16))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        for done, (config_index, result) in enumerate(executor.map(_play_job, jobs, chunksize=chunksize), 1):
+            results[config_index].append(result)
+            if progress is not None:
+                progress(done, len(jobs))
+    return [summarize(config_results) for config_results in results]
+
+
+def write_csv(output, configs, summaries, pilot):
+    writer = csv.writer(output)
+    names = [name for name, _, _ in SETTINGS]
+    writer.writerow(names + ['pilot'] + list(RESULT_COLUMNS))
+    for config, summary in zip(configs, summaries):
+        writer.writerow([config[name] for name in names] + [pilot] + [summary[name] for name in RESULT_COLUMNS])
+
+
+def _parse_values(value_type):
+    def parse(text):
+        try:
+            return [value_type(value) for value in text.split(',')]
+        except ValueError:
+            raise argparse.ArgumentTypeError(f'expected comma separated {value_type.__name__} values: {text!r}')
+    return parse
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(
+        description='Play many games without rendering and write survival stats per difficulty config as CSV',
+    )
+    parser.add_argument('--games', type=int, default=100, help='games per config, seeds go from --first-seed up')
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--pilot', choices=PILOTS, default='autopilot')
+    parser.add_argument('--max-ticks', type=int, default=MAX_TICKS,
+                        help=f'a game, that lasts that long, counts as survived (default: {MAX_TICKS})')
+    parser.add_argument('--workers', type=int, help='processes in the pool (default: number of CPUs)')
+    parser.add_argument('--output', '-o', help='CSV file, standard output by default')
+    for name, value_type, default in SETTINGS:
+        parser.add_argument(f'--{name.replace("_", "-")}', type=_parse_values(value_type), default=[default],
+                            help=f'comma separated values to try (default: {default})')
+
+    options = parser.parse_args(args)
+    if options.games < 1:
+        parser.error('--games must be at least 1')
+    # bad values would only fail inside the workers, one traceback per game
+    if min(options.falling_speed) < 1:
+        parser.error('--falling-speed values must be at least 1 tick')
+    if not all(0 <= fading <= 1 for fading in options.fading):
+        parser.error('--fading values must be between 0 and 1')
+    for name in ('delay_scale', 'row_speed_limit', 'column_speed_limit'):
+        if min(getattr(options, name)) <= 0:
+            parser.error(f'--{name.replace("_", "-")} values must be positive')
+    return options
+
+
+def main():
+    options = parse_args()
+    configs = get_configs(options)
+    seeds = range(options.first_seed, options.first_seed + options.games)
+
+    def show_progress(done, total):
+        if done % 100 == 0 or done == total:
+            print(f'\r{done}/{total} games', end='\n' if done == total else '', file=sys.stderr, flush=True)
+
+    summaries = run_batch(configs, seeds, options.pilot, options.max_ticks, options.workers, show_progress)
+
+    if options.output:
+        with open(options.output, 'w', newline='') as output:
+            write_csv(output, configs, summaries, options.pilot)
+    else:
+        write_csv(sys.stdout, configs, summaries, options.pilot)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+'''Plasma gun bullets, kept in a pool.'''
+
+import array
+
+from space_garbage.obstacles import POINT_MASK
+
+
+BULLETS_POOL_SIZE = 512
+
+# bullet shows a muzzle flash of two frames, then it is launched and flies
+FLASH_STAGE, BLAST_STAGE, LAUNCH_STAGE, FLIGHT_STAGE = range(4)
+
+
+class BulletSystem:
+    '''Bullets, stored in a preallocated pool of parallel arrays.
+
+    All bullets move and collide with obstacles in one update() per tick. Slots of
+    finished bullets go back to the free list and are reused by next shots, when
+    the pool is full new shots are ignored.
+    '''
+
+    def __init__(self, capacity=BULLETS_POOL_SIZE):
+        self.capacity = capacity
+        self.rows = array.array('d', [0]) * capacity
+        self.columns = array.array('d', [0]) * capacity
+        self.rows_speeds = array.array('d', [0]) * capacity
+        self.columns_speeds = array.array('d', [0]) * capacity
+        self.stages = array.array('b', [0]) * capacity
+
+        self.launched = 0  # bullets, that left the gun on the last update
+
+        self._free_slots = list(range(capacity - 1, -1, -1))
+        self._active_slots = []
+
+    def __len__(self):
+        return len(self._active_slots)
+
+    def spawn(self, row, column, rows_speed=-0.3, columns_speed=0):
+        '''Shoot a bullet, direction and speed can be specified. Return False if pool is full.'''
+
+        if not self._free_slots:
+            return False
+
+        slot = self._free_slots.pop()
+        self.rows[slot], self.columns[slot] = row, column
+        self.rows_speeds[slot], self.columns_speeds[slot] = rows_speed, columns_speed
+        self.stages[slot] = FLASH_STAGE
+        self._active_slots.append(slot)
+        return True
+
+    def update(self, canvas, obstacles):
+        '''Move and draw every bullet. Return list of obstacles hit by bullets.'''
+
+        rows_number, columns_number = canvas.getmaxyx()  # getmaxyx returns heigh and width of window
+        max_row, max_column = rows_number - 1, columns_number - 1
+
+        rows, columns, stages = self.rows, self.columns, self.stages
+        active_slots = []
+        flying_slots = []
+        self.launched = 0
+
+        for slot in self._active_slots:
+            stage = stages[slot]
+            row, column = rows[slot], columns[slot]
+
+            if stage == FLASH_STAGE:
+                if not (0 < row < max_row and 0 < column < max_column):
+                    # spaceship wraps around the screen and may shoot from out of it
+                    self._free_slots.append(slot)
+                    continue
+
+                canvas.addstr(round(row), round(column), '*')
+                stages[slot] = BLAST_STAGE
+                active_slots.append(slot)
+                continue
+
+            if stage == BLAST_STAGE:
+                canvas.addstr(round(row), round(column), 'O')
+                stages[slot] = LAUNCH_STAGE
+                active_slots.append(slot)
+                continue
+
+            canvas.addstr(round(row), round(column), ' ')
+            if stage == LAUNCH_STAGE:
+                stages[slot] = FLIGHT_STAGE
+                self.launched += 1
+
+            row += self.rows_speeds[slot]
+            column += self.columns_speeds[slot]
+            rows[slot], columns[slot] = row, column
+
+            if 0 < row < max_row and 0 < column < max_column:
+                flying_slots.append(slot)
+            else:
+                self._free_slots.append(slot)
+
+        boxes = [(rows[slot], columns[slot], 1, 1) for slot in flying_slots]
+        hits = {}
+        for box_index, obstacle in obstacles.collide_boxes(boxes, [POINT_MASK] * len(boxes)):
+            hits.setdefault(flying_slots[box_index], obstacle)
+
+        for slot in flying_slots:
+            if slot in hits:
+                self._free_slots.append(slot)
+                continue
+
+            symbol = '-' if self.columns_speeds[slot] else '|'
+            canvas.addstr(round(rows[slot]), round(columns[slot]), symbol)
+            active_slots.append(slot)
+
+        self._active_slots = active_slots
+        return list(hits.values())
@@ -0,0 +1,89 @@
+'''Fixed timestep game clock.'''
+
+import time
+
+
+MAX_CATCH_UP_TICKS = 5
+
+
+class GameClock:
+    '''Keeps simulation ticks in step with the monotonic clock.
+
+    advance() tells how many ticks are due. When the game falls behind, several
+    ticks run in a row to catch up, but not more than max_catch_up, the rest are
+    dropped and the schedule starts anew. Frames are rendered at their own rate,
+    or after every advance with ticks, when render_delay is not set.
+    '''
+
+    def __init__(self, tick_delay, render_delay=None, max_catch_up=MAX_CATCH_UP_TICKS,
+                 realtime=True, clock=time.monotonic, sleep=time.sleep):
+        self.tick_delay = tick_delay
+        self.render_delay = render_delay
+        self.max_catch_up = max_catch_up
+        self.realtime = realtime
+        self._clock = clock
+        self._sleep = sleep
+
+        self.ticks = 0
+        self.late_ticks = 0
+        self.dropped_ticks = 0
+        self.frame_time = 0.0
+        self.max_frame_time = 0.0
+
+        now = clock()
+        self._next_tick = now
+        self._next_render = now
+        self._frame_started_at = now
+        self._frame_ticks = 0
+        self._rendered_ticks = 0
+
+    def advance(self):
+        '''Return number of simulation ticks to run now.'''
+
+        now = self._clock()
+        self._frame_started_at = now
+
+        if not self.realtime:
+            due = 1
+        elif now < self._next_tick:
+            due = 0
+        else:
+            due = int((now - self._next_tick) // self.tick_delay) + 1
+            self.late_ticks += due - 1
+
+            if due > self.max_catch_up:
+                self.dropped_ticks += due - self.max_catch_up
+                due = self.max_catch_up
+                self._next_tick = now + self.tick_delay
+            else:
+                self._next_tick += due * self.tick_delay
+
+        self.ticks += due
+        self._frame_ticks = due
+        return due
+
+    def should_render(self):
+        '''Check if it is time to show a new frame.'''
+
+        if self.ticks == self._rendered_ticks:
+            return False
+
+        if self.realtime and self.render_delay is not None:
+            now = self._clock()
+            if now < self._next_render:
+                return False
+            self._next_render = max(self._next_render + self.render_delay, now)
+
+        self._rendered_ticks = self.ticks
+        return True
+
+    def wait(self):
+        '''Update frame time counters and sleep until the next tick is due.'''
+
+        now = self._clock()
+        if self._frame_ticks:
+            self.frame_time = now - self._frame_started_at
+            self.max_frame_time = max(self.max_frame_time, self.frame_time)
+
+        if self.realtime and now < self._next_tick:
+            self._sleep(self._next_tick - now)
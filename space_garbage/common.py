@@ -1,51 +1,129 @@
 '''Common helper funcs to work with frames.'''
 
+import functools
+
+
 SPACE_KEY_CODE = 32
 LEFT_KEY_CODE = 260
 RIGHT_KEY_CODE = 261
 UP_KEY_CODE = 259
 DOWN_KEY_CODE = 258
+IDLE_CONTROLS = (0, 0, False)  # rows_direction, columns_direction, space_pressed
+
+
+class Sprite:
+    '''Multiline text fragment, parsed once into its size and non-blank runs.
+
+    Every run is a tuple (row, column, text) relative to the top left corner,
+    spaces between runs are transparent and never drawn. Mask is a collision
+    bitmask: an int per row, with bits set from the first to the last non-blank
+    symbol of the row, bit 0 stands for the leftmost column.
+    '''
+
+    __slots__ = ('text', 'rows', 'columns', 'runs', 'mask')
+
+    def __init__(self, text):
+        lines = text.splitlines()
+        self.text = text
+        self.rows = len(lines)
+        self.columns = max([len(line) for line in lines])
+        self.runs = tuple(_iter_runs(lines))
+        self.mask = tuple(_get_row_mask(line) for line in lines)
+
+    def __str__(self):
+        return self.text
+
+    @property
+    def size(self):
+        return self.rows, self.columns
+
+
+def _iter_runs(lines):
+    for row, line in enumerate(lines):
+        column = 0
+        for chunk in line.split(' '):
+            if chunk:
+                yield row, column, chunk
+            column += len(chunk) + 1
+
+
+def _get_row_mask(line):
+    first_column = len(line) - len(line.lstrip(' '))
+    last_column = len(line.rstrip(' '))
+    if last_column <= first_column:
+        return 0
+    return ((1 << (last_column - first_column)) - 1) << first_column
+
+
+def masks_overlap(mask, corner_row, corner_column, other_mask, other_corner_row, other_corner_column):
+    """Check if two collision bitmasks placed at given corners have a common cell."""
+
+    corner_row, corner_column = round(corner_row), round(corner_column)
+    other_corner_row, other_corner_column = round(other_corner_row), round(other_corner_column)
+    shift = other_corner_column - corner_column
+
+    first_row = max(corner_row, other_corner_row)
+    last_row = min(corner_row + len(mask), other_corner_row + len(other_mask))
+    for row in range(first_row, last_row):
+        bits = mask[row - corner_row]
+        other_bits = other_mask[row - other_corner_row]
+        if shift >= 0:
+            other_bits <<= shift
+        else:
+            bits <<= -shift
+        if bits & other_bits:
+            return True
+    return False
 
 
-def draw_frame(canvas, start_row, start_column, text, negative=False):
-    """Draw multiline text fragment on canvas, erase text instead of drawing if negative=True is specified."""
+@functools.lru_cache(maxsize=256)
+def _get_text_sprite(text):
+    return Sprite(text)
+
+
+def get_sprite(frame):
+    """Return Sprite for a frame, plain strings are compiled once and cached."""
+
+    if isinstance(frame, Sprite):
+        return frame
+    return _get_text_sprite(frame)
+
+
+def draw_frame(canvas, start_row, start_column, frame, negative=False):
+    """Draw sprite or multiline text on canvas, erase it instead of drawing if negative=True is specified."""
 
     rows_number, columns_number = canvas.getmaxyx()
+    start_row, start_column = round(start_row), round(start_column)
 
-    for row, line in enumerate(text.splitlines(), round(start_row)):
-        if row < 0:
+    for run_row, run_column, text in get_sprite(frame).runs:
+        row = start_row + run_row
+        if row < 0 or row >= rows_number:
             continue
 
-        if row >= rows_number:
-            break
-
-        for column, symbol in enumerate(line, round(start_column)):
-            if column < 0:
-                continue
+        column = start_column + run_column
+        if column < 0:
+            text = text[-column:]
+            column = 0
 
-            if column >= columns_number:
-                break
+        # Don`t touch a lower right corner of the window, curses will raise exception in that case.
+        # https://docs.python.org/3/library/curses.html#curses.window.addch
+        last_column = columns_number - 1 if row == rows_number - 1 else columns_number
+        if column >= last_column:
+            continue
 
-            if symbol == ' ':
-                continue
+        text = text[:last_column - column]
+        if not text:
+            continue
 
-            # Check that current position it is not in a lower right corner of the window
-            # Curses will raise exception in that case. Don`t ask why…
-            # https://docs.python.org/3/library/curses.html#curses.window.addch
-            if row == rows_number - 1 and column == columns_number - 1:
-                continue
+        if negative:
+            text = ' ' * len(text)
+        canvas.addstr(row, column, text)
 
-            symbol = symbol if not negative else ' '
-            canvas.addch(row, column, symbol)
 
+def get_frame_size(frame):
+    """Calculate size of sprite or multiline text, return pair — number of rows and colums."""
 
-def get_frame_size(text):
-    """Calculate size of multiline text fragment, return pair — number of rows and colums."""
-    
-    lines = text.splitlines()
-    rows = len(lines)
-    columns = max([len(line) for line in lines])
-    return rows, columns
+    return get_sprite(frame).size
 
 
 def read_controls(canvas):
@@ -79,6 +157,18 @@ def read_controls(canvas):
     return rows_direction, columns_direction, space_pressed
 
 
+def encode_controls(rows_direction, columns_direction, space_pressed):
+    """Pack controls state into a single byte."""
+
+    return (rows_direction + 1) | (columns_direction + 1) << 2 | bool(space_pressed) << 4
+
+
+def decode_controls(code):
+    """Unpack controls state packed by encode_controls."""
+
+    return (code & 3) - 1, (code >> 2 & 3) - 1, bool(code & 16)
+
+
 def get_garbage_delay_tics(year):
     if year < 1961:
         return None
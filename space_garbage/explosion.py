@@ -1,25 +1,28 @@
+from space_garbage.common import Sprite
+
+
 explosion_frames = [
-    """\
+    Sprite("""\
            (_)
        (  (   (  (
       () (  (  )
         ( )  ()
-    """,
-    """\
+    """),
+    Sprite("""\
            (_)
        (  (   (
          (  (  )
           )  (
-    """,
-    """\
+    """),
+    Sprite("""\
             (
           (   (
          (     (
           )  (
-    """,
-    """\
+    """),
+    Sprite("""\
             (
               (
             (
-    """,
+    """),
 ]
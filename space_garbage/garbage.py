@@ -1,10 +1,13 @@
-duck = '''
+from space_garbage.common import Sprite
+
+
+duck = Sprite('''
    _
 ,_(')<
 \___)
-'''
+''')
 
-hubble = '''
+hubble = Sprite('''
     \  \  \  \\
       \  \  \  \\
    _____\__\__\__\__
@@ -13,31 +16,31 @@ hubble = '''
   \_/_______\  \  \  \\
              \  \  \  \\
               \__\__\__\\
-'''
+''')
 
-lamp = '''
+lamp = Sprite('''
  _
 (~)
  #
-'''
+''')
 
-trash_medium = '''
+trash_medium = Sprite('''
      ____
   __/    \\
  /        \\
 /         _\\
 \     ___/
  \___/
-'''
+''')
 
-trash_small = '''
+trash_small = Sprite('''
      ___
    _/ o \\
   /     /
   \____/
-'''
+''')
 
-trash_large = '''
+trash_large = Sprite('''
           ___
      ____/   \___
   __/           /
@@ -45,4 +48,4 @@ trash_large = '''
 |             __\\
 \       _____/
  \_____/
-'''
+''')
@@ -0,0 +1,68 @@
+'''Trades visual detail for time, when the game can`t keep up with its ticks.'''
+
+
+# what is given up on every level, each level keeps the savings of the previous ones
+LEVELS = (
+    'full detail',
+    'stars stop blinking',
+    'rocket flame stops',
+    'explosions are shorter',
+    'year caption is redrawn rarely',
+)
+FREEZE_STARS_LEVEL = 1
+FREEZE_FLAME_LEVEL = 2
+SHORT_EXPLOSIONS_LEVEL = 3
+RARE_HUD_LEVEL = 4
+WINDOW_FRAMES = 10
+HEADROOM = 0.5  # share of the budget, frames should fit into to restore detail
+RESTORE_WINDOWS = 3  # windows in a row with headroom, needed to restore a level
+
+
+class LoadGovernor:
+    '''Watches frame cost against the budget and sets the detail level.
+
+    Cost of every WINDOW_FRAMES frames is averaged. The level goes up a step, when
+    the average is over budget, and down a step after RESTORE_WINDOWS windows in
+    a row, that took less than HEADROOM of the budget.
+    '''
+
+    def __init__(self, budget, window_frames=WINDOW_FRAMES, headroom=HEADROOM, restore_windows=RESTORE_WINDOWS):
+        self.budget = budget
+        self.window_frames = window_frames
+        self.headroom = headroom
+        self.restore_windows = restore_windows
+
+        self.level = 0
+        self.level_changes = 0
+        self._window_cost = 0.0
+        self._window_size = 0
+        self._calm_windows = 0
+
+    @property
+    def level_name(self):
+        return LEVELS[self.level]
+
+    def record(self, frame_cost):
+        '''Account time in seconds taken by a frame: its ticks and rendering.'''
+
+        self._window_cost += frame_cost
+        self._window_size += 1
+        if self._window_size < self.window_frames:
+            return
+
+        average = self._window_cost / self._window_size
+        self._window_cost, self._window_size = 0.0, 0
+
+        if average > self.budget:
+            self._calm_windows = 0
+            if self.level < len(LEVELS) - 1:
+                self.level += 1
+                self.level_changes += 1
+        elif average < self.budget * self.headroom and self.level > 0:
+            self._calm_windows += 1
+            if self._calm_windows >= self.restore_windows:
+                self._calm_windows = 0
+                self.level -= 1
+                self.level_changes += 1
+        else:
+            self._calm_windows = 0
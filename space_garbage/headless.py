@@ -0,0 +1,56 @@
+'''In-memory canvas to run the game without a terminal.'''
+
+import collections
+
+from space_garbage.render import WindowBase, encode_snapshot
+
+
+DEFAULT_ROWS = 40
+DEFAULT_COLUMNS = 120
+
+
+class HeadlessCanvas(WindowBase):
+    '''Window in memory, keeps symbols and attributes of every cell and takes keys from a queue.'''
+
+    def __init__(self, rows=DEFAULT_ROWS, columns=DEFAULT_COLUMNS, keys=()):
+        self.rows = rows
+        self.columns = columns
+        self.lines = [[' '] * columns for _ in range(rows)]
+        self.attrs = [[0] * columns for _ in range(rows)]
+        self.keys = collections.deque(keys)
+        self.non_blocking = False
+        self.refreshes = 0
+
+    def getch(self):
+        '''Return next queued key code or -1, as curses does in nodelay mode.'''
+
+        if not self.keys:
+            return -1
+        return self.keys.popleft()
+
+    def border(self):
+        horizontal = '+' + '-' * (self.columns - 2) + '+'
+        self.lines[0][:] = horizontal
+        self.lines[-1][:] = horizontal
+        for line in self.lines[1:-1]:
+            line[0] = line[-1] = '|'
+
+    def refresh(self):
+        self.refreshes += 1
+
+    def nodelay(self, flag):
+        self.non_blocking = flag
+
+    def _put_text(self, row, column, text, attr):
+        self.lines[row][column:column + len(text)] = text
+        self.attrs[row][column:column + len(text)] = [attr] * len(text)
+
+    def dump(self):
+        '''Return current content of the canvas as multiline text.'''
+
+        return '\n'.join(''.join(line) for line in self.lines)
+
+    def snapshot(self):
+        '''Return content as a pair of bytes, see encode_snapshot().'''
+
+        return encode_snapshot(self.lines, self.attrs)
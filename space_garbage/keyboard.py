@@ -0,0 +1,89 @@
+'''Key state buffer, filled as soon as input arrives.'''
+
+import math
+import selectors
+import time
+
+from space_garbage.common import DOWN_KEY_CODE, LEFT_KEY_CODE, RIGHT_KEY_CODE, SPACE_KEY_CODE, UP_KEY_CODE
+
+
+KEY_HOLD_TIME = 0.1  # terminals send no key releases, a key is held while it repeats faster than that
+
+
+class KeyState:
+    '''Keys pressed and held on the canvas.
+
+    wait() sleeps until the input file descriptor is readable or the timeout
+    passes, and collects keys right away, so it suits as GameClock sleep. The
+    game reads controls() once per tick: a key counts, if it was pressed or
+    repeated since the previous tick and it is still held. So a tap counts once,
+    even when the game catches up on several ticks back to back.
+    '''
+
+    def __init__(self, canvas, input_fd=None, hold_time=KEY_HOLD_TIME, clock=time.monotonic):
+        self.canvas = canvas
+        self.hold_time = hold_time
+        self._clock = clock
+        self._last_seen = {}  # key code: time of the last event of the key
+        self._pressed = set()  # keys pressed since the previous controls()
+        self._last_controls = -math.inf  # time of the previous controls()
+
+        self._selector = None
+        if input_fd is not None:
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(input_fd, selectors.EVENT_READ)
+
+    def poll(self):
+        '''Collect keys waiting on the canvas.'''
+
+        now = self._clock()
+        while True:
+            key_code = self.canvas.getch()
+            if key_code == -1:
+                break
+            if not self.is_held(key_code, now):
+                self._pressed.add(key_code)
+            self._last_seen[key_code] = now
+
+    def is_held(self, key_code, now=None):
+        now = self._clock() if now is None else now
+        return now - self._last_seen.get(key_code, -math.inf) < self.hold_time
+
+    def wait(self, timeout):
+        '''Sleep until some input arrives or the timeout passes.'''
+
+        if self._selector is None:
+            time.sleep(timeout)
+        else:
+            self._selector.select(timeout)
+        self.poll()
+
+    def controls(self):
+        '''Return tuple with controls state, as read_controls() does.'''
+
+        self.poll()
+        now = self._clock()
+
+        def is_active(key_code):
+            if key_code in self._pressed:
+                return True
+            return self._last_seen.get(key_code, -math.inf) > self._last_controls and self.is_held(key_code, now)
+
+        rows_direction = columns_direction = 0
+        if is_active(UP_KEY_CODE):
+            rows_direction = -1
+        elif is_active(DOWN_KEY_CODE):
+            rows_direction = 1
+        if is_active(RIGHT_KEY_CODE):
+            columns_direction = 1
+        elif is_active(LEFT_KEY_CODE):
+            columns_direction = -1
+        space_pressed = is_active(SPACE_KEY_CODE)
+
+        self._pressed.clear()
+        self._last_controls = now
+        return rows_direction, columns_direction, space_pressed
+
+    def close(self):
+        if self._selector is not None:
+            self._selector.close()
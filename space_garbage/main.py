@@ -1,67 +1,366 @@
 '''Game entry point.'''
 
+import argparse
+import contextlib
 import curses
+import functools
+import os
 import random
+import sys
 import time
 
 from space_garbage.animation import AnimationHandler
+from space_garbage.ansi import AnsiTerminal
+from space_garbage.autopilot import Autopilot
+from space_garbage.clock import GameClock
+from space_garbage.common import read_controls
+from space_garbage.governor import LoadGovernor
+from space_garbage.headless import DEFAULT_COLUMNS, DEFAULT_ROWS, HeadlessCanvas
+from space_garbage.keyboard import KeyState
+from space_garbage.memprofile import MEMPROFILE_ENV_VAR, MemoryProfiler
+from space_garbage.profiler import PROFILE_ENV_VAR, ThroughputLog, TickProfiler
+from space_garbage.render import FrameBuffer
+from space_garbage.replay import InputRecorder, InputReplay
+from space_garbage.scheduler import Scheduler
+from space_garbage.spectator import SpectatorServer, parse_address
+from space_garbage.starfield import Starfield
+from space_garbage.timeline import Timeline
+from space_garbage.world import Camera, ChunkedStarfield
 
 
 BACKGROUND_STARS_NUM = 200
 TICKS_DELAY = 0.1
 TICKS_IN_SECOND = 1 / TICKS_DELAY
 SPACESHIP_STEP_SIZE = 1
+HEADLESS_TICKS = 1000
+GOVERNOR_BUDGET_SHARE = 0.8  # of the tick delay, frames may take before the governor drops detail
+MAX_SEED = 2 ** 64  # replays save seeds as unsigned 64 bit numbers
+
+
+def parse_args(args=None):
+    '''Parses command line options of the game.'''
+
+    parser = argparse.ArgumentParser(description='Space Garbage: clean the space')
+    parser.add_argument('--headless', action='store_true',
+                        help='run without a terminal and as fast as possible, report ticks/sec')
+    parser.add_argument('--backend', choices=('curses', 'ansi'), default='curses',
+                        help='draw with curses or write ANSI escape sequences directly')
+    parser.add_argument('--uncapped', action='store_true', help='run ticks one after another, without sleeping')
+    parser.add_argument('--ticks', type=int,
+                        help=f'stop after given number of ticks, {HEADLESS_TICKS} by default in headless mode')
+    parser.add_argument('--stars', type=int, default=BACKGROUND_STARS_NUM, help='number of background stars')
+    parser.add_argument('--fps', type=float, help='frames per second, a frame after every tick by default')
+    parser.add_argument('--seed', type=int, help=f'seed of the random numbers generator, from 0 to {MAX_SEED - 1}')
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS, help='canvas height in headless mode')
+    parser.add_argument('--columns', type=int, default=DEFAULT_COLUMNS, help='canvas width in headless mode')
+    parser.add_argument('--world-rows', type=int,
+                        help='height of the world, the screen follows the ship over it, the screen height by default')
+    parser.add_argument('--world-columns', type=int,
+                        help='width of the world, the screen width by default')
+    parser.add_argument('--record', metavar='PATH', help='save random seed and player input to a replay file')
+    parser.add_argument('--replay', metavar='PATH',
+                        help='replay recorded game without a terminal and as fast as possible')
+    parser.add_argument('--autopilot', action='store_true', help='let a bot fly the spaceship')
+    parser.add_argument('--log-interval', type=int, metavar='TICKS',
+                        help='print speed of the game every given number of ticks, to stderr')
+    parser.add_argument('--no-governor', action='store_true',
+                        help='keep full detail, even when the game can`t keep up with its ticks')
+    parser.add_argument('--timeline', metavar='PATH',
+                        help='read garbage density, kinds and captions by year from a CSV, JSON lines or JSON file')
+    parser.add_argument('--split-process', action='store_true',
+                        help='simulate the world in a separate process, render frames it publishes')
+    parser.add_argument('--serve', metavar='HOST:PORT', type=parse_address,
+                        help='stream frames to spectators, watch them with watch-space-garbage HOST:PORT')
+    parser.add_argument('--profile', action='store_true',
+                        help=f'show tick timings over the game, {PROFILE_ENV_VAR}=1 does the same')
+    parser.add_argument('--profile-trace', metavar='PATH',
+                        help='save profile as Chrome trace events JSON on exit, implies --profile')
+    parser.add_argument('--memprofile', metavar='PATH', default=os.environ.get(MEMPROFILE_ENV_VAR),
+                        help=f'sample memory usage and save a leak report on exit, {MEMPROFILE_ENV_VAR}=PATH '
+                             'does the same')
+
+    options = parser.parse_args(args)
+    if options.seed is None:
+        options.seed = random.randrange(MAX_SEED)
+    elif not 0 <= options.seed < MAX_SEED:
+        parser.error(f'--seed must be between 0 and {MAX_SEED - 1}')
+    if options.stars < 0:
+        parser.error('--stars must not be negative')
+    if options.replay:
+        options.headless = True
+    if options.headless and options.ticks is None:
+        options.ticks = HEADLESS_TICKS
+    if os.environ.get(PROFILE_ENV_VAR) or options.profile_trace:
+        options.profile = True
+    if options.split_process and (options.profile or options.memprofile):
+        parser.error('profiling is not supported with --split-process, the simulation runs in another process')
+    if options.split_process and options.autopilot:
+        parser.error('--autopilot is not supported with --split-process, the simulation takes keys of the terminal')
+    if options.split_process and options.backend != 'curses':
+        parser.error('--split-process draws with curses only')
+    return options
 
 
 def set_canvas(canvas, show_cursor=False, show_border=True, non_blocking_input=True):
     '''Sets canvas settings.'''
 
-    curses.curs_set(show_cursor)
+    if show_cursor is not None:
+        curses.curs_set(show_cursor)
     canvas.nodelay(non_blocking_input)
     if show_border:
         canvas.border()
 
 
-def draw(canvas):
-    '''Draws the game on the canvas.'''
+def draw(canvas, options=None, profiler=None, controller=None, memory_profiler=None):
+    '''Draws the game on the canvas. Returns number of played ticks.
+
+    Controller is a callable, that returns controls state once per tick,
+    it reads keys pressed on the canvas by default. In a terminal keys are
+    collected as soon as they arrive, while the game waits for the next tick.
+    '''
+
+    options = options or parse_args([])
+    uses_curses = options.backend == 'curses' and not options.headless
+    screen = FrameBuffer(canvas)
+    set_canvas(screen, show_cursor=False if uses_curses else None)
+    scheduler = Scheduler(profiler)
+    window_rows, window_columns = screen.getmaxyx()  # getmaxyx returns heigh and width of window
+    keys = None
+    sleep = time.sleep
+    # the autopilot is made with the animation handler of every game below
+    uses_autopilot = controller is None and options.autopilot
+    if controller is None and options.headless and not uses_autopilot:
+        controller = functools.partial(read_controls, screen)
+    elif controller is None and not uses_autopilot:
+        input_fd = canvas.fileno() if hasattr(canvas, 'fileno') else sys.stdin.fileno()
+        keys = KeyState(screen, input_fd)
+        controller, sleep = keys.controls, keys.wait
+    if options.timeline:
+        # once for all games, every game reads the file again as it goes
+        Timeline.check_file(options.timeline)
+    server = None
+    if options.serve:
+        server = SpectatorServer(*options.serve, window_rows, window_columns)
+        server.start()
+
+    if options.headless:
+        sound = None
+    else:
+        sound = curses.beep if uses_curses else canvas.beep
+    world_rows = max(options.world_rows or window_rows, window_rows)
+    world_columns = max(options.world_columns or window_columns, window_columns)
+    world = hud = screen
+    camera = None
+    if (world_rows, world_columns) != (window_rows, window_columns):
+        world = HeadlessCanvas(world_rows, world_columns)
+        hud = HeadlessCanvas(window_rows, window_columns)
+        camera = Camera(window_rows, window_columns, world_rows, world_columns)
+    recorder = None
+    if options.record:
+        recorder = InputRecorder(options.record, options.seed, window_rows, window_columns,
+                                 options.stars, world_rows, world_columns, options.timeline)
+    realtime = not (options.headless or options.uncapped)
+    # detail changes the course of the game, so the governor is off, when it should replay exactly
+    governor = None
+    if realtime and not (options.record or options.no_governor):
+        governor = LoadGovernor(TICKS_DELAY * GOVERNOR_BUDGET_SHARE)
+    # a soak run of the autopilot goes on with the next seed after every game over,
+    # a recorded game can`t, as a replay only knows the first seed
+    restarts_games = uses_autopilot and not options.record
+    seed = options.seed
+
+    def start_new_game():
+        animation_handler, starfield = start_game(scheduler, world, hud, seed, options.stars, options.timeline,
+                                                  sound=sound, camera=camera, governor=governor)
+        if uses_autopilot:
+            return animation_handler, starfield, Autopilot(animation_handler, world_rows, world_columns)
+        return animation_handler, starfield, controller
+
+    animation_handler, starfield, controller = start_new_game()
+
+    render_delay = 1 / options.fps if options.fps else None
+    clock = GameClock(TICKS_DELAY, render_delay, realtime=realtime, sleep=sleep)
+
+    def get_entity_counts():
+        return {
+            'coroutines': len(scheduler),
+            'obstacles': len(animation_handler.obstacles),
+            'bullets': len(animation_handler.bullets),
+            'stars': len(starfield),
+        }
+
+    def get_loop_counters():
+        counters = {'late ticks': clock.late_ticks, 'dropped ticks': clock.dropped_ticks}
+        if governor is not None:
+            counters['detail level'] = governor.level
+            counters['detail changes'] = governor.level_changes
+        if server is not None:
+            counters['spectator frames'] = server.frames_sent
+            counters['skipped'] = server.frames_skipped
+        return counters
+
+    throughput_log = ThroughputLog(options.log_interval, animation_handler.year) if options.log_interval else None
+
+    if profiler is None:
+        phase = tick = _skip_measure
+    else:
+        phase, tick = profiler.phase, profiler.tick
+
+    ticks = 0
+    game_over_logged = False
+    try:
+        while scheduler and ticks != options.ticks:
+            due_ticks = clock.advance()
+            for _ in range(due_ticks):
+                with tick():
+                    with phase('input'):
+                        animation_handler.controls = controller()
+                        if recorder is not None:
+                            recorder.record(animation_handler.controls)
+                    with phase('simulate'):
+                        scheduler.run_tick()
+                ticks += 1
+                if throughput_log is not None:
+                    throughput_log.tick(ticks, animation_handler.year, get_entity_counts())
+                if memory_profiler is not None and memory_profiler.should_sample(ticks):
+                    memory_profiler.sample(ticks, {
+                        **get_entity_counts(),
+                        **{f'scheduled {name}': number for name, number in scheduler.count_coroutines().items()},
+                    })
+                if animation_handler.game_over_year is not None and not game_over_logged:
+                    game_over_logged = True
+                    if throughput_log is not None:
+                        throughput_log.game_over(ticks, animation_handler.game_over_year, seed)
+                    if restarts_games:
+                        scheduler.close()
+                        animation_handler.timeline.close()
+                        world.erase()
+                        if hud is not world:
+                            hud.erase()
+                        last_year = animation_handler.year
+                        seed = (seed + 1) % MAX_SEED
+                        animation_handler, starfield, controller = start_new_game()
+                        game_over_logged = False
+                        if throughput_log is not None:
+                            throughput_log.new_game(last_year, animation_handler.year)
+                if ticks == options.ticks:
+                    break
 
-    set_canvas(canvas)
-    coroutines = []
-    window_rows, window_columns = canvas.getmaxyx()  # getmaxyx returns heigh and width of window
+            if clock.should_render():
+                with phase('draw'):
+                    if camera is not None:
+                        camera.show(world, screen, hud)
+                    if profiler is not None:
+                        profiler.draw_overlay(screen, get_entity_counts())
+                    screen.flush()
+                with phase('refresh'):
+                    canvas.refresh()
+                    if server is not None and server.has_spectators:
+                        server.publish(*screen.snapshot())
+            clock.wait()
+            if governor is not None and due_ticks:
+                governor.record(clock.frame_time)
+            if profiler is not None and due_ticks:
+                profiler.record_frame(clock.frame_time, clock.max_frame_time, get_loop_counters())
+    finally:
+        scheduler.close()
+        animation_handler.timeline.close()
+        if keys is not None:
+            keys.close()
+        if recorder is not None:
+            recorder.close()
+        if server is not None:
+            server.close()
+
+    return ticks
+
+
+def start_game(scheduler, world, hud, seed, stars=BACKGROUND_STARS_NUM, timeline_path=None, sound=None,
+               camera=None, governor=None):
+    '''Spawns coroutines of a new game in the scheduler. Returns its animation handler and starfield.
+
+    Stars take random numbers from the same generator, as garbage does, so every
+    game with the seed and the number of stars goes the same way, wherever it is played.
+    The timeline file is read as the game goes, check it with Timeline.check_file() before.
+    '''
+
+    window_rows, window_columns = hud.getmaxyx()
+    world_rows, world_columns = world.getmaxyx()
     border_size = 1
+    rng = random.Random(seed)
+    timeline = Timeline.from_file(timeline_path, check=False) if timeline_path else None
+    animation_handler = AnimationHandler(world, border_size, scheduler, sound=sound, rng=rng, timeline=timeline,
+                                         hud=hud, camera=camera, governor=governor)
+    # keep garbage and stars as dense as on a single screen
+    screens_across = world_columns // window_columns
+    animation_handler.garbage_per_spawn = screens_across
 
-    animation_handler = AnimationHandler(canvas, border_size, coroutines)
-
-    for i in range(BACKGROUND_STARS_NUM):
-        random_row = random.randint(border_size, window_rows-2*border_size)
-        random_column = random.randint(border_size, window_columns-2*border_size)
-        random_symbol = random.choice('+*.:')
-        coroutines.append(animation_handler.blink(random_row, random_column,
-                                                  symbol=random_symbol))
-
-    coroutines.append(animation_handler.animate_spaceship(window_rows, window_columns,
-                                                          SPACESHIP_STEP_SIZE))
-
-    coroutines.append(animation_handler.fill_orbit_with_garbage(window_columns))
-    coroutines.append(animation_handler.increase_year(TICKS_IN_SECOND))
-    coroutines.append(animation_handler.animate_year(window_rows, window_columns))
-
-    while True:
-        for coroutine in coroutines.copy():
-            try:
-                coroutine.send(None)
-            except StopIteration:
-                coroutines.remove(coroutine)
-            if not coroutines:
-                break
-        canvas.refresh()
-        canvas.border()
-        time.sleep(TICKS_DELAY)
+    starfield = Starfield(rng) if camera is None else ChunkedStarfield(camera, rng)
+    for i in range(stars * screens_across * (world_rows // window_rows)):
+        random_row = rng.randint(border_size, world_rows-2*border_size)
+        random_column = rng.randint(border_size, world_columns-2*border_size)
+        random_symbol = rng.choice('+*.:')
+        starfield.add(random_row, random_column, symbol=random_symbol)
+    scheduler.spawn(animation_handler.animate_stars(starfield))
+
+    scheduler.spawn(animation_handler.animate_spaceship(world_rows, world_columns,
+                                                        SPACESHIP_STEP_SIZE))
+    scheduler.spawn(animation_handler.animate_bullets())
+
+    scheduler.spawn(animation_handler.fill_orbit_with_garbage(world_columns))
+    scheduler.spawn(animation_handler.increase_year(TICKS_IN_SECOND))
+    scheduler.spawn(animation_handler.animate_year(window_rows, window_columns))
+    return animation_handler, starfield
+
+
+def _skip_measure(name=None):
+    return contextlib.nullcontext()
+
+
+def run_headless(options, profiler=None, controller=None, memory_profiler=None):
+    '''Plays the game on an in-memory canvas and prints ticks/sec.'''
+
+    canvas = HeadlessCanvas(options.rows, options.columns)
+    started_at = time.perf_counter()
+    ticks = draw(canvas, options, profiler, controller, memory_profiler)
+    elapsed = time.perf_counter() - started_at
+    print(f'{ticks} ticks in {elapsed:.2f} s, {ticks / elapsed:.1f} ticks/sec')
 
 
 def main():
-    curses.update_lines_cols()
-    curses.wrapper(draw)
+    options = parse_args()
+    profiler = TickProfiler(options.profile_trace) if options.profile else None
+    memory_profiler = MemoryProfiler(options.memprofile) if options.memprofile else None
+    replay = None
+    if options.replay:
+        replay = InputReplay(options.replay)
+        replay.check_timeline(options.timeline)
+        options.seed, options.rows, options.columns = replay.seed, replay.rows, replay.columns
+        options.stars = replay.stars
+        options.world_rows, options.world_columns = replay.world_rows, replay.world_columns
+        options.ticks = replay.ticks
+
+    try:
+        if options.headless:
+            run_headless(options, profiler, controller=replay, memory_profiler=memory_profiler)
+        elif options.split_process:
+            from space_garbage.simprocess import run_split  # shared memory needs Python 3.8
+
+            curses.update_lines_cols()
+            curses.wrapper(run_split, options)
+        elif options.backend == 'ansi':
+            with AnsiTerminal() as terminal:
+                draw(terminal, options, profiler, memory_profiler=memory_profiler)
+        else:
+            curses.update_lines_cols()
+            curses.wrapper(draw, options, profiler, memory_profiler=memory_profiler)
+    finally:
+        if profiler is not None:
+            profiler.close()
+            print(profiler.summary())
+        if memory_profiler is not None:
+            memory_profiler.close()
+            print(f'Memory report is saved to {options.memprofile}')
 
 
 if __name__ == '__main__':
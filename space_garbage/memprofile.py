@@ -0,0 +1,139 @@
+'''Opt-in memory profiler, that looks for leaks over long games.'''
+
+import collections
+import gc
+import os
+import sysconfig
+import tracemalloc
+import types
+
+
+MEMPROFILE_ENV_VAR = 'SPACE_GARBAGE_MEMPROFILE'
+SAMPLE_INTERVAL_TICKS = 100
+GROWTH_SAMPLES = 10  # samples in a row, that should not decrease to flag a growth
+REPORT_TOP = 20
+PACKAGE_NAME = 'space_garbage'
+PACKAGE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+STDLIB_DIRECTORY = sysconfig.get_paths()['stdlib']
+
+
+class MemoryProfiler:
+    '''Samples memory every interval ticks and writes a report to report_path on close().
+
+    A sample has tracemalloc sizes of memory allocated by every source file,
+    numbers of live objects of game classes and coroutines found by gc, and
+    counts passed by the game. A value is flagged as growing, if it has not
+    decreased over last GROWTH_SAMPLES samples and has increased in total.
+    '''
+
+    def __init__(self, report_path, interval=SAMPLE_INTERVAL_TICKS):
+        self.report_path = report_path
+        self.interval = interval
+        self.ticks = []
+        self.sizes = collections.defaultdict(dict)  # file: {sample index: bytes}
+        self.counts = collections.defaultdict(dict)  # name: {sample index: number}
+
+        tracemalloc.start()
+
+    def should_sample(self, tick):
+        return tick % self.interval == 0
+
+    def sample(self, tick, counts):
+        '''Take a snapshot, counts are numbers of entities the game knows about.'''
+
+        index = len(self.ticks)
+        self.ticks.append(tick)
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+        ))
+        for statistic in snapshot.statistics('filename'):
+            self.sizes[_get_module_name(statistic.traceback[0].filename)][index] = statistic.size
+
+        for name, number in counts.items():
+            self.counts[name][index] = number
+        for name, number in _count_live_objects().items():
+            self.counts[name][index] = number
+
+    def find_growing(self):
+        '''Return names of files and counters, which kept growing over last samples.'''
+
+        growing = []
+        for values in (self.sizes, self.counts):
+            for name, samples in values.items():
+                if _is_growing(self._get_series(samples)):
+                    growing.append(name)
+        return growing
+
+    def report(self):
+        '''Return text report on memory by file and numbers of objects, first sample against the last one.'''
+
+        if not self.ticks:
+            return 'Memory profile: no samples, the game was shorter than one interval\n'
+
+        growing = set(self.find_growing())
+        _, peak_size = tracemalloc.get_traced_memory()
+        lines = [
+            f'Memory profile: {len(self.ticks)} samples, every {self.interval} ticks, '
+            f'peak {peak_size / 1024:.1f} KiB traced',
+            '',
+            f'{"file":<50} {"first KiB":>10} {"last KiB":>10} {"growth KiB":>11}',
+        ]
+        lines += self._format_rows(self.sizes, growing, scale=1024)
+        lines += ['', f'{"objects":<50} {"first":>10} {"last":>10} {"growth":>11}']
+        lines += self._format_rows(self.counts, growing, scale=1, top=None)
+        if growing:
+            lines += ['', 'Kept growing over last samples: ' + ', '.join(sorted(growing))]
+        return '\n'.join(lines) + '\n'
+
+    def close(self):
+        '''Write the report and stop tracing.'''
+
+        report = self.report()
+        with open(self.report_path, 'w') as report_file:
+            report_file.write(report)
+        tracemalloc.stop()
+        return report
+
+    def _get_series(self, samples):
+        return [samples.get(index, 0) for index in range(len(self.ticks))]
+
+    def _format_rows(self, values, growing, scale, top=REPORT_TOP):
+        rows = []
+        for name, samples in values.items():
+            series = self._get_series(samples)
+            rows.append((series[-1] - series[0], name, series[0], series[-1]))
+        rows.sort(reverse=True)
+
+        formatted = []
+        for growth, name, first, last in rows[:top]:
+            flag = '  GROWING' if name in growing else ''
+            formatted.append(f'{name:<50} {first / scale:>10.1f} {last / scale:>10.1f} {growth / scale:>+11.1f}{flag}')
+        return formatted
+
+
+def _is_growing(series):
+    recent = series[-GROWTH_SAMPLES:]
+    if len(recent) < GROWTH_SAMPLES:
+        return False
+    return recent[-1] > recent[0] and all(previous <= value for previous, value in zip(recent, recent[1:]))
+
+
+def _get_module_name(filename):
+    if filename.startswith(PACKAGE_DIRECTORY):
+        return PACKAGE_NAME + filename[len(PACKAGE_DIRECTORY):]
+    if filename.startswith(STDLIB_DIRECTORY):
+        return '<stdlib>' + filename[len(STDLIB_DIRECTORY):]
+    return filename
+
+
+def _count_live_objects():
+    counts = collections.Counter()
+    for obj in gc.get_objects():
+        if isinstance(obj, types.CoroutineType):
+            counts[f'coroutine {obj.__qualname__}'] += 1
+        elif type(obj).__module__.startswith(PACKAGE_NAME):
+            counts[type(obj).__qualname__] += 1
+    return counts
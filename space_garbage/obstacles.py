@@ -1,16 +1,31 @@
 import asyncio
+import itertools
 
-from space_garbage.common import draw_frame
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from space_garbage.common import draw_frame, masks_overlap
+
+
+GRID_CELL_SIZE = 8
+NUMPY_MIN_PAIRS = 4096  # on less pairs pure python loop is faster than array setup
+POINT_MASK = (1,)
 
 
 class Obstacle:
 
-    def __init__(self, row, column, rows_size=1, columns_size=1, uid=None):
+    __slots__ = ('row', 'column', 'rows_size', 'columns_size', 'uid', 'hit', 'mask')
+
+    def __init__(self, row, column, rows_size=1, columns_size=1, uid=None, mask=None):
         self.row = row
         self.column = column
         self.rows_size = rows_size
         self.columns_size = columns_size
         self.uid = uid
+        self.hit = False
+        self.mask = mask
 
     def get_bounding_box_frame(self):
         # increment box size to compensate obstacle movement
@@ -24,16 +39,162 @@ class Obstacle:
         row, column = self.get_bounding_box_corner_pos()
         return row, column, self.get_bounding_box_frame()
 
-    def has_collision(self, obj_corner_row, obj_corner_column, obj_size_rows=1, obj_size_columns=1):
-        '''Determine if collision has occured. Return True or False.'''
-        return has_collision(
-            (self.row, self.column),
-            (self.rows_size, self.columns_size),
-            (obj_corner_row, obj_corner_column),
-            (obj_size_rows, obj_size_columns),
+    @property
+    def box(self):
+        return self.row, self.column, self.rows_size, self.columns_size
+
+    def has_collision(self, obj_corner_row, obj_corner_column, obj_size_rows=1, obj_size_columns=1,
+                      obj_mask=None):
+        '''Determine if collision has occured. Return True or False.
+        Collision is exact to a cell, when both obstacle and object have a mask.
+        '''
+        obj_box = (obj_corner_row, obj_corner_column, obj_size_rows, obj_size_columns)
+        if not collide_many([obj_box], [self.box]):
+            return False
+        return self.overlaps_mask(obj_mask, obj_corner_row, obj_corner_column)
+
+    def overlaps_mask(self, obj_mask, obj_corner_row, obj_corner_column):
+        '''Check exact overlap with a bitmask, True if either mask is unknown.'''
+
+        if self.mask is None or obj_mask is None:
+            return True
+        return masks_overlap(self.mask, self.row, self.column, obj_mask, obj_corner_row,
+                             obj_corner_column)
+
+
+class ObstacleGrid:
+    '''Registry of obstacles by uid, with a spatial hash of square cells of the play field.
+
+    Obstacles are registered with add() and moved in place with move(), so every
+    query touches only the cells around the point or rectangle it asks about.
+    Obstacles without uid get a new one on registration.
+    '''
+
+    def __init__(self, cell_size=GRID_CELL_SIZE):
+        self.cell_size = cell_size
+        self._obstacles = {}
+        self._spans = {}
+        self._cells = {}
+        self._uids = itertools.count(1)
+
+    def __len__(self):
+        return len(self._obstacles)
+
+    def __iter__(self):
+        return iter(list(self._obstacles.values()))
+
+    def __contains__(self, obstacle):
+        return self._obstacles.get(obstacle.uid) is obstacle
+
+    def get(self, uid):
+        '''Return registered obstacle with given uid or None.'''
+
+        return self._obstacles.get(uid)
+
+    def add(self, obstacle):
+        '''Register obstacle in every cell its box covers.'''
+
+        if obstacle.uid is None:
+            obstacle.uid = next(self._uids)
+
+        span = self._get_span(obstacle.row, obstacle.column, obstacle.rows_size,
+                              obstacle.columns_size)
+        self._obstacles[obstacle.uid] = obstacle
+        self._spans[obstacle.uid] = span
+        for cell in _iter_cells(span):
+            self._cells.setdefault(cell, set()).add(obstacle.uid)
+
+    def remove(self, obstacle):
+        '''Unregister obstacle, do nothing if it is not in the grid.'''
+
+        if obstacle not in self:
+            return
+
+        del self._obstacles[obstacle.uid]
+        span = self._spans.pop(obstacle.uid)
+        for cell in _iter_cells(span):
+            bucket = self._cells[cell]
+            bucket.discard(obstacle.uid)
+            if not bucket:
+                del self._cells[cell]
+
+    def move(self, obstacle, row, column):
+        '''Move obstacle to new position, rebucketing it only if its cells changed.'''
+
+        obstacle.row, obstacle.column = row, column
+        span = self._get_span(row, column, obstacle.rows_size, obstacle.columns_size)
+        if self._spans.get(obstacle.uid) == span:
+            return
+
+        self.remove(obstacle)
+        self.add(obstacle)
+
+    def query_point(self, row, column):
+        '''Return obstacles colliding with a single cell.'''
+
+        return self.query_rect(row, column, mask=POINT_MASK)
+
+    def query_rect(self, corner_row, corner_column, size_rows=1, size_columns=1, mask=None):
+        '''Return obstacles colliding with a rectangle, or with a bitmask inside it.'''
+
+        box = (corner_row, corner_column, size_rows, size_columns)
+        masks = None if mask is None else [mask]
+        return [obstacle for _, obstacle in self.collide_boxes([box], masks)]
+
+    def collide_boxes(self, boxes, masks=None):
+        '''Test many boxes (row, column, rows_size, columns_size) against obstacles at once.
+        Return list of pairs (box_index, obstacle).
+
+        Optional masks are collision bitmasks of the boxes. Pairs with overlapping
+        boxes are then checked to the cell with a few shifts and ANDs.
+        '''
+
+        candidates = set()
+        for row, column, rows_size, columns_size in boxes:
+            span = self._get_span(row, column, rows_size, columns_size)
+            candidates.update(self._get_candidates(span))
+        if not candidates:
+            return []
+
+        candidates = [self._obstacles[uid] for uid in sorted(candidates)]
+        pairs = collide_many(boxes, [obstacle.box for obstacle in candidates])
+        collisions = [(box_index, candidates[obstacle_index]) for box_index, obstacle_index in pairs]
+        if masks is None:
+            return collisions
+
+        return [
+            (box_index, obstacle) for box_index, obstacle in collisions
+            if obstacle.overlaps_mask(masks[box_index], boxes[box_index][0], boxes[box_index][1])
+        ]
+
+    def _get_candidates(self, span):
+        first_row, first_column, last_row, last_column = span
+        if first_row == last_row and first_column == last_column:
+            return self._cells.get((first_row, first_column), ())
+
+        candidates = set()
+        for cell in _iter_cells(span):
+            candidates.update(self._cells.get(cell, ()))
+        return candidates
+
+    def _get_span(self, row, column, rows_size, columns_size):
+        # the far edge is included, as floating positions are compared with half-open ranges
+        size = self.cell_size
+        return (
+            int(row // size),
+            int(column // size),
+            int((row + rows_size) // size),
+            int((column + columns_size) // size),
         )
 
 
+def _iter_cells(span):
+    first_row, first_column, last_row, last_column = span
+    for cell_row in range(first_row, last_row + 1):
+        for cell_column in range(first_column, last_column + 1):
+            yield cell_row, cell_column
+
+
 def _get_bounding_box_lines(rows, columns):
 
     yield ' ' + '-' * columns + ' '
@@ -60,31 +221,52 @@ async def show_obstacles(canvas, obstacles):
             draw_frame(canvas, row, column, frame, negative=True)
 
 
-def _is_point_inside(corner_row, corner_column, size_rows, size_columns, point_row,
-                     point_row_column):
-    rows_flag = corner_row <= point_row < corner_row + size_rows
-    columns_flag = corner_column <= point_row_column < corner_column + size_columns
+def has_collision(obstacle_corner, obstacle_size, obj_corner, obj_size=(1, 1)):
+    '''Determine if collision has occured. Return True or False.'''
 
-    return rows_flag and columns_flag
+    return bool(collide_many([(*obj_corner, *obj_size)], [(*obstacle_corner, *obstacle_size)]))
 
 
-def has_collision(obstacle_corner, obstacle_size, obj_corner, obj_size=(1, 1)):
-    '''Determine if collision has occured. Return True or False.'''
+def collide_many(query_boxes, obstacle_boxes):
+    '''Find every colliding pair of boxes from two sequences.
+
+    Box is a tuple (corner_row, corner_column, size_rows, size_columns). Return list
+    of index pairs (query_index, obstacle_index), ordered by query_index. Uses NumPy
+    for large batches, if it is installed.
+    '''
+
+    if not query_boxes or not obstacle_boxes:
+        return []
+
+    if numpy is not None and len(query_boxes) * len(obstacle_boxes) >= NUMPY_MIN_PAIRS:
+        return _collide_many_numpy(query_boxes, obstacle_boxes)
+    return _collide_many_python(query_boxes, obstacle_boxes)
+
+
+def _collide_many_python(query_boxes, obstacle_boxes):
+    obstacle_edges = [
+        (obstacle_index, row, column, row + size_rows, column + size_columns)
+        for obstacle_index, (row, column, size_rows, size_columns) in enumerate(obstacle_boxes)
+    ]
+
+    pairs = []
+    for query_index, (row, column, size_rows, size_columns) in enumerate(query_boxes):
+        bottom_row, right_column = row + size_rows, column + size_columns
+        for obstacle_index, top, left, bottom, right in obstacle_edges:
+            if top < bottom_row and row < bottom and left < right_column and column < right:
+                pairs.append((query_index, obstacle_index))
+    return pairs
 
-    opposite_obstacle_corner = (
-        obstacle_corner[0] + obstacle_size[0] - 1,
-        obstacle_corner[1] + obstacle_size[1] - 1,
-    )
 
-    opposite_obj_corner = (
-        obj_corner[0] + obj_size[0] - 1,
-        obj_corner[1] + obj_size[1] - 1,
-    )
+def _collide_many_numpy(query_boxes, obstacle_boxes):
+    queries = numpy.asarray(query_boxes, dtype=float).reshape(-1, 4)
+    obstacles = numpy.asarray(obstacle_boxes, dtype=float).reshape(-1, 4)
 
-    return any([
-        _is_point_inside(*obstacle_corner, *obstacle_size, *obj_corner),
-        _is_point_inside(*obstacle_corner, *obstacle_size, *opposite_obj_corner),
+    rows, columns = queries[:, 0, None], queries[:, 1, None]
+    bottom_rows, right_columns = rows + queries[:, 2, None], columns + queries[:, 3, None]
+    tops, lefts = obstacles[:, 0], obstacles[:, 1]
+    bottoms, rights = tops + obstacles[:, 2], lefts + obstacles[:, 3]
 
-        _is_point_inside(*obj_corner, *obj_size, *obstacle_corner),
-        _is_point_inside(*obj_corner, *obj_size, *opposite_obstacle_corner),
-    ])
+    overlaps = (tops < bottom_rows) & (rows < bottoms) & (lefts < right_columns) & (columns < rights)
+    query_indexes, obstacle_indexes = numpy.nonzero(overlaps)
+    return list(zip(query_indexes.tolist(), obstacle_indexes.tolist()))
@@ -0,0 +1,183 @@
+'''Opt-in profiler of game ticks.'''
+
+import collections
+import contextlib
+import json
+import os
+import sys
+import time
+
+
+PROFILE_ENV_VAR = 'SPACE_GARBAGE_PROFILE'
+TICK_HISTORY_SIZE = 1000
+TRACE_EVENTS_LIMIT = 500_000
+OVERLAY_UPDATE_FRAMES = 10
+
+
+class TickProfiler:
+    '''Collects time spent in game phases and in coroutines, grouped by their function.
+
+    Durations of recent ticks give p50/p99 for the overlay. When trace_path is set,
+    every measurement is also kept as a Chrome trace event and saved by close(),
+    open the file in chrome://tracing or https://ui.perfetto.dev.
+    '''
+
+    def __init__(self, trace_path=None, clock=time.perf_counter):
+        self.trace_path = trace_path
+        self.clock = clock
+
+        self.phase_times = collections.Counter()
+        self.function_times = collections.Counter()
+        self.function_calls = collections.Counter()
+        self.tick_times = collections.deque(maxlen=TICK_HISTORY_SIZE)
+        self.ticks = 0
+        self.frame_time = 0.0
+        self.max_frame_time = 0.0
+        self.loop_counters = {}
+
+        self._events = collections.deque(maxlen=TRACE_EVENTS_LIMIT) if trace_path else None
+        self._started_at = clock()
+        self._pid = os.getpid()
+        self._overlay_text = ''
+        self._frames = 0
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        '''Measure a phase of the game loop: input, simulate, draw or refresh.'''
+
+        started_at = self.clock()
+        try:
+            yield
+        finally:
+            duration = self.clock() - started_at
+            self.phase_times[name] += duration
+            self._add_event(name, 'phase', started_at, duration)
+
+    @contextlib.contextmanager
+    def tick(self):
+        '''Measure a whole simulation tick.'''
+
+        started_at = self.clock()
+        try:
+            yield
+        finally:
+            duration = self.clock() - started_at
+            self.ticks += 1
+            self.tick_times.append(duration)
+            self._add_event('tick', 'tick', started_at, duration)
+
+    def add_call(self, function_name, started_at, duration):
+        '''Record a single resume of a coroutine.'''
+
+        self.function_times[function_name] += duration
+        self.function_calls[function_name] += 1
+        self._add_event(function_name, 'coroutine', started_at, duration)
+
+    def record_frame(self, frame_time, max_frame_time, loop_counters):
+        '''Record time of the last frame and counters of the game loop, like late and dropped ticks.'''
+
+        self.frame_time = frame_time
+        self.max_frame_time = max_frame_time
+        self.loop_counters = loop_counters
+
+    def get_percentile(self, percent):
+        '''Return tick duration percentile over recent ticks, in seconds.'''
+
+        if not self.tick_times:
+            return 0.0
+        tick_times = sorted(self.tick_times)
+        index = min(len(tick_times) - 1, int(len(tick_times) * percent / 100))
+        return tick_times[index]
+
+    def draw_overlay(self, canvas, entities, row=1, column=2):
+        '''Draw a line with tick time percentiles and entity counts over the game.'''
+
+        if self._frames % OVERLAY_UPDATE_FRAMES == 0:
+            counts = ' '.join(f'{name} {count}' for name, count in entities.items())
+            loop_counts = ' '.join(f'{name} {count}' for name, count in self.loop_counters.items())
+            text = (f'tick p50 {self.get_percentile(50) * 1000:.2f} ms '
+                    f'p99 {self.get_percentile(99) * 1000:.2f} ms | '
+                    f'frame {self.frame_time * 1000:.2f} ms max {self.max_frame_time * 1000:.2f} ms '
+                    f'{loop_counts} | {counts}')
+            self._overlay_text = text.ljust(len(self._overlay_text))
+        self._frames += 1
+
+        rows_number, columns_number = canvas.getmaxyx()
+        text = self._overlay_text[:columns_number - column - 1]
+        if text and row < rows_number:
+            canvas.addstr(row, column, text)
+
+    def summary(self):
+        '''Return text report of collected timings.'''
+
+        lines = [
+            f'{self.ticks} ticks, tick p50 {self.get_percentile(50) * 1000:.3f} ms, '
+            f'p99 {self.get_percentile(99) * 1000:.3f} ms, max frame {self.max_frame_time * 1000:.3f} ms',
+        ]
+        if self.loop_counters:
+            lines.append(', '.join(f'{name} {count}' for name, count in self.loop_counters.items()))
+        lines.append('phases:')
+        for name, seconds in self.phase_times.most_common():
+            lines.append(f'  {name:<40} {seconds:10.3f} s')
+
+        lines.append('coroutines:')
+        for name, seconds in self.function_times.most_common():
+            calls = self.function_calls[name]
+            lines.append(f'  {name:<40} {seconds:10.3f} s {calls:10} calls')
+        return '\n'.join(lines)
+
+    def close(self):
+        '''Save Chrome trace events, if trace_path is set.'''
+
+        if self.trace_path is None:
+            return
+
+        with open(self.trace_path, 'w') as trace_file:
+            json.dump({'traceEvents': list(self._events), 'displayTimeUnit': 'ms'}, trace_file)
+
+    def _add_event(self, name, category, started_at, duration):
+        if self._events is None:
+            return
+
+        self._events.append({
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': (started_at - self._started_at) * 1_000_000,
+            'dur': duration * 1_000_000,
+            'pid': self._pid,
+            'tid': 0,
+        })
+
+
+class ThroughputLog:
+    '''Prints speed of the game and entity counts every interval ticks, for long unattended runs.'''
+
+    def __init__(self, interval, year, output=sys.stderr, clock=time.perf_counter):
+        self.interval = interval
+        self.output = output
+        self.clock = clock
+        self._last_time = clock()
+        self._last_year = year
+        self._played_years = 0  # of games, that ended since the last line
+
+    def tick(self, ticks, year, entities):
+        if ticks % self.interval:
+            return
+
+        now = self.clock()
+        elapsed = max(now - self._last_time, 1e-9)
+        years = self._played_years + year - self._last_year
+        counts = ' '.join(f'{name} {count}' for name, count in entities.items())
+        print(f'tick {ticks} year {year}: {self.interval / elapsed:.0f} ticks/sec, '
+              f'{years * 60 / elapsed:.0f} years/min | {counts}', file=self.output, flush=True)
+        self._last_time, self._last_year, self._played_years = now, year, 0
+
+    def game_over(self, ticks, year, seed):
+        print(f'tick {ticks}: game over in year {year}, seed {seed}', file=self.output, flush=True)
+
+    def new_game(self, last_year, year):
+        '''Count years of the ended game up to last_year as played, and go on from year of the new game.'''
+
+        self._played_years += last_year - self._last_year
+        self._last_year = year
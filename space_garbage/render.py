@@ -0,0 +1,215 @@
+'''Double-buffered screen in front of a curses window.'''
+
+import curses
+import itertools
+
+
+SPAN_MAX_GAP = 3  # unchanged cells, that are cheaper to resend than to start a new span
+CELL_ATTRS = (curses.A_NORMAL, curses.A_DIM, curses.A_BOLD)  # attributes by their code in snapshots
+
+
+class WindowBase:
+    '''Part of the curses window API, shared by windows the game draws on without curses.
+
+    Subclasses set rows and columns and implement _put_text(), that gets text
+    already clipped to the window width.
+    '''
+
+    rows = columns = 0
+
+    def getmaxyx(self):
+        return self.rows, self.columns
+
+    def addstr(self, row, column, text, attr=0):
+        if not (0 <= row < self.rows and 0 <= column < self.columns):
+            raise curses.error(f'addstr() position {row}, {column} is out of the window')
+
+        self._put_text(row, column, text[:self.columns - column], attr)
+
+    def addch(self, row, column, symbol, attr=0):
+        if isinstance(symbol, int):
+            symbol = chr(symbol)
+        self.addstr(row, column, symbol, attr)
+
+    def derwin(self, *args):
+        '''Return a region of the window, arguments are the same as for curses derwin.'''
+
+        if len(args) == 2:
+            begin_row, begin_column = args
+            rows, columns = self.rows - begin_row, self.columns - begin_column
+        else:
+            rows, columns, begin_row, begin_column = args
+        return BufferRegion(self, begin_row, begin_column, rows, columns)
+
+    def erase(self):
+        '''Fill the window with blanks.'''
+
+        blank_line = ' ' * self.columns
+        for row in range(self.rows):
+            self._put_text(row, 0, blank_line, 0)
+
+    def _put_text(self, row, column, text, attr):
+        raise NotImplementedError
+
+
+class FrameBuffer(WindowBase):
+    '''Software copy of a curses window.
+
+    Entities draw into the buffer with the same calls they would use on a curses
+    window. refresh() compares the frame with the one shown before and sends only
+    changed spans of every row to the window.
+    '''
+
+    def __init__(self, window):
+        self.window = window
+        self.rows, self.columns = window.getmaxyx()
+        self.has_border = False
+
+        self._chars = [[' '] * self.columns for _ in range(self.rows)]
+        self._attrs = [[0] * self.columns for _ in range(self.rows)]
+        self._shown_chars = [row.copy() for row in self._chars]
+        self._shown_attrs = [row.copy() for row in self._attrs]
+        self._dirty_rows = set()
+
+    def blit_row(self, row, chars, attrs):
+        '''Replace the row from its beginning with given symbols and attributes, a list of each.'''
+
+        end_column = min(len(chars), self.columns)
+        self._chars[row][:end_column] = chars[:end_column]
+        self._attrs[row][:end_column] = attrs[:end_column]
+        self._dirty_rows.add(row)
+
+    def border(self):
+        '''Draw window border once, the buffer never sends anything over it later.'''
+
+        self.has_border = True
+        self.window.border()
+
+    def getch(self):
+        return self.window.getch()
+
+    def nodelay(self, flag):
+        self.window.nodelay(flag)
+
+    def flush(self):
+        '''Send changed spans of the frame to the window without refreshing it.'''
+
+        for row in self._dirty_rows:
+            chars, attrs = self._chars[row], self._attrs[row]
+            shown_chars, shown_attrs = self._shown_chars[row], self._shown_attrs[row]
+            if chars == shown_chars and attrs == shown_attrs:
+                continue
+
+            if not self.has_border:
+                self._flush_row(row, 0, self.columns)
+            elif 0 < row < self.rows - 1:
+                self._flush_row(row, 1, self.columns - 1)
+
+            shown_chars[:] = chars
+            shown_attrs[:] = attrs
+
+        self._dirty_rows.clear()
+
+    def refresh(self):
+        self.flush()
+        self.window.refresh()
+
+    def snapshot(self):
+        '''Return the frame as a pair of bytes, see encode_snapshot().
+
+        The border is put over the frame in ASCII, as the window never shows anything drawn there.
+        '''
+
+        if not self.has_border:
+            return encode_snapshot(self._chars, self._attrs)
+
+        horizontal = ['+'] + ['-'] * (self.columns - 2) + ['+']
+        blank_attrs = [curses.A_NORMAL] * self.columns
+        chars = [horizontal] + [['|'] + line[1:-1] + ['|'] for line in self._chars[1:-1]] + [horizontal]
+        attrs = [blank_attrs] + [[curses.A_NORMAL] + line[1:-1] + [curses.A_NORMAL]
+                                 for line in self._attrs[1:-1]] + [blank_attrs]
+        return encode_snapshot(chars, attrs)
+
+    def _put_text(self, row, column, text, attr):
+        end_column = column + len(text)
+        self._chars[row][column:end_column] = text
+        self._attrs[row][column:end_column] = [attr] * len(text)
+        self._dirty_rows.add(row)
+
+    def _flush_row(self, row, first_column, last_column):
+        chars, attrs = self._chars[row], self._attrs[row]
+        shown_chars, shown_attrs = self._shown_chars[row], self._shown_attrs[row]
+
+        changed_columns = [
+            column for column in range(first_column, last_column)
+            if chars[column] != shown_chars[column] or attrs[column] != shown_attrs[column]
+        ]
+        if not changed_columns:
+            return
+
+        span_start = span_end = changed_columns[0]
+        for column in changed_columns[1:]:
+            span_attr = attrs[span_start]
+            if column - span_end <= SPAN_MAX_GAP + 1 and \
+                    all(attr == span_attr for attr in attrs[span_end + 1:column + 1]):
+                span_end = column
+                continue
+
+            self._write(row, span_start, ''.join(chars[span_start:span_end + 1]), span_attr)
+            span_start = span_end = column
+
+        self._write(row, span_start, ''.join(chars[span_start:span_end + 1]), attrs[span_start])
+
+    def _write(self, row, column, text, attr):
+        try:
+            self.window.addstr(row, column, text, attr)
+        except curses.error:
+            # curses raises after writing the lower right corner of the window, as it
+            # can`t move the cursor further: https://docs.python.org/3/library/curses.html#curses.window.addch
+            if row != self.rows - 1 or column + len(text) != self.columns:
+                raise
+
+
+class BufferRegion(WindowBase):
+    '''Part of a window, that behaves like a curses derived window.'''
+
+    def __init__(self, buffer, begin_row, begin_column, rows, columns):
+        self.buffer = buffer
+        self.begin_row = begin_row
+        self.begin_column = begin_column
+        self.rows = rows
+        self.columns = columns
+
+    def _put_text(self, row, column, text, attr):
+        self.buffer.addstr(self.begin_row + row, self.begin_column + column, text, attr)
+
+
+def encode_snapshot(lines, attrs):
+    '''Return rows of symbols and attributes as a pair of bytes — symbols and attribute codes, a byte per cell.'''
+
+    attr_codes = {attr: code for code, attr in enumerate(CELL_ATTRS)}
+    symbols = ''.join(''.join(line) for line in lines).encode('ascii', errors='replace')
+    attr_bytes = bytes(attr_codes.get(attr, 0) for line in attrs for attr in line)
+    return symbols, attr_bytes
+
+
+def draw_snapshot(screen, symbols, attrs, columns, shown_symbols=None, shown_attrs=None):
+    '''Draw snapshot with rows of given width on the screen, clipped to the screen size.
+
+    Rows equal to the shown snapshot are skipped.
+    '''
+
+    screen_rows, screen_columns = screen.getmaxyx()
+    for row in range(min(len(symbols) // columns, screen_rows)):
+        start, end = row * columns, row * columns + min(columns, screen_columns)
+        row_symbols, row_attrs = symbols[start:end], attrs[start:end]
+        if shown_symbols is not None and \
+                row_symbols == shown_symbols[start:end] and row_attrs == shown_attrs[start:end]:
+            continue
+
+        column = 0
+        for code, group in itertools.groupby(row_attrs):
+            length = len(list(group))
+            text = row_symbols[column:column + length].decode('ascii')
+            screen.addstr(row, column, text, CELL_ATTRS[code])
+            column += length
@@ -0,0 +1,119 @@
+'''Recording of player input and its deterministic replay.
+
+Replay file starts with a header: magic bytes, format version, RNG seed, canvas
+size and the rest of options, that change the course of the game: number of
+stars, world size and a fingerprint of the timeline file. Then it holds controls state of every tick, packed into a byte by
+encode_controls and run-length encoded as pairs (number of ticks, controls byte).
+'''
+
+import hashlib
+import struct
+
+from space_garbage.common import IDLE_CONTROLS, decode_controls, encode_controls
+
+
+MAGIC = b'SGRP'
+VERSION = 2
+# magic, version, seed, rows, columns, stars, world rows, world columns, timeline fingerprint
+HEADER = struct.Struct('<4sBQHHIHH32s')
+NO_TIMELINE = bytes(32)
+FINGERPRINT_CHUNK_SIZE = 65536
+RUN = struct.Struct('<HB')  # ticks, controls
+MAX_RUN_TICKS = 0xFFFF
+
+
+class ReplayFormatError(Exception):
+    pass
+
+
+class ReplayMismatchError(Exception):
+    pass
+
+
+def get_timeline_fingerprint(path):
+    '''Return SHA-256 of the timeline file, NO_TIMELINE for the default timeline.'''
+
+    if path is None:
+        return NO_TIMELINE
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as timeline_file:
+        for chunk in iter(lambda: timeline_file.read(FINGERPRINT_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+class InputRecorder:
+    '''Writes controls state of every tick to a replay file.'''
+
+    def __init__(self, path, seed, rows, columns, stars, world_rows, world_columns, timeline_path=None):
+        timeline_fingerprint = get_timeline_fingerprint(timeline_path)
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, rows, columns, stars, world_rows, world_columns,
+                                    timeline_fingerprint))
+        self._code = None
+        self._ticks = 0
+
+    def record(self, controls):
+        code = encode_controls(*controls)
+        if code == self._code and self._ticks < MAX_RUN_TICKS:
+            self._ticks += 1
+            return
+
+        self._write_run()
+        self._code, self._ticks = code, 1
+
+    def close(self):
+        self._write_run()
+        self.file.close()
+
+    def _write_run(self):
+        if self._ticks:
+            self.file.write(RUN.pack(self._ticks, self._code))
+
+
+class InputReplay:
+    '''Feeds recorded controls back, a tick per call. Controls are idle after the record ends.'''
+
+    def __init__(self, path):
+        with open(path, 'rb') as replay_file:
+            data = replay_file.read()
+
+        if len(data) < HEADER.size:
+            raise ReplayFormatError(f'{path} is too short for a replay file')
+
+        magic, version = HEADER.unpack_from(data)[:2]
+        if magic != MAGIC or version != VERSION:
+            raise ReplayFormatError(f'{path} is not a replay file of version {VERSION}')
+        (_, _, self.seed, self.rows, self.columns, self.stars, self.world_rows, self.world_columns,
+         self.timeline_fingerprint) = HEADER.unpack_from(data)
+        self.path = path
+
+        runs_data = data[HEADER.size:]
+        if len(runs_data) % RUN.size:
+            raise ReplayFormatError(f'{path} is truncated')
+
+        self._runs = [(ticks, decode_controls(code)) for ticks, code in RUN.iter_unpack(runs_data)]
+        self.ticks = sum(ticks for ticks, _ in self._runs)
+        self._run_index = 0
+        self._run_ticks_left = self._runs[0][0] if self._runs else 0
+
+    def check_timeline(self, timeline_path):
+        '''Raise ReplayMismatchError, if the game was recorded with another timeline.'''
+
+        if get_timeline_fingerprint(timeline_path) != self.timeline_fingerprint:
+            recorded = 'another timeline'
+            if self.timeline_fingerprint == NO_TIMELINE:
+                recorded = 'the default timeline'
+            raise ReplayMismatchError(f'{self.path} was recorded with {recorded}, '
+                                      'pass the same --timeline to replay it')
+
+    def __call__(self):
+        while self._run_ticks_left == 0:
+            self._run_index += 1
+            if self._run_index >= len(self._runs):
+                return IDLE_CONTROLS
+            self._run_ticks_left = self._runs[self._run_index][0]
+
+        self._run_ticks_left -= 1
+        return self._runs[self._run_index][1]
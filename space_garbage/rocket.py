@@ -1,4 +1,7 @@
-rocket_frame_1 = '''\
+from space_garbage.common import Sprite
+
+
+rocket_frame_1 = Sprite('''\
   .
  .'.
  |o|
@@ -8,9 +11,9 @@ rocket_frame_1 = '''\
  ( )
   )
  ( )
-'''
+''')
 
-rocket_frame_2 = '''\
+rocket_frame_2 = Sprite('''\
   .
  .'.
  |o|
@@ -20,4 +23,4 @@ rocket_frame_2 = '''\
   )
  ( )
   (
-'''
+''')
@@ -0,0 +1,83 @@
+'''Tick based scheduler of game coroutines.'''
+
+import collections
+import heapq
+import itertools
+
+
+class Sleep:
+    '''Awaitable, that suspends a coroutine for given number of ticks.'''
+
+    __slots__ = ('ticks',)
+
+    def __init__(self, ticks):
+        self.ticks = ticks
+
+    def __await__(self):
+        yield self.ticks
+
+
+class Scheduler:
+    '''Runs coroutines tick by tick.
+
+    Coroutines wait in a heap ordered by the tick they should wake up at, so a
+    sleeping coroutine costs nothing until its deadline. A coroutine sleeps by
+    awaiting Sleep(ticks), bare yields like asyncio.sleep(0) sleep for one tick.
+    With a profiler every resume is timed and recorded by coroutine function.
+    '''
+
+    def __init__(self, profiler=None):
+        self.profiler = profiler
+        self.tick = 0
+        self._queue = []
+        self._order = itertools.count()
+
+    def __len__(self):
+        return len(self._queue)
+
+    def spawn(self, coroutine, delay=1):
+        '''Schedule coroutine to run after given number of ticks, on the next one by default.'''
+
+        heapq.heappush(self._queue, (self.tick + delay, next(self._order), coroutine))
+
+    def run_tick(self):
+        '''Resume every coroutine, that should wake up on the next tick.'''
+
+        self.tick += 1
+        if self.profiler is not None:
+            self._run_profiled_tick()
+            return
+
+        queue = self._queue
+        while queue and queue[0][0] <= self.tick:
+            _, _, coroutine = heapq.heappop(queue)
+            try:
+                ticks = coroutine.send(None)
+            except StopIteration:
+                continue
+            self.spawn(coroutine, ticks or 1)
+
+    def _run_profiled_tick(self):
+        queue, profiler, clock = self._queue, self.profiler, self.profiler.clock
+        while queue and queue[0][0] <= self.tick:
+            _, _, coroutine = heapq.heappop(queue)
+            started_at = clock()
+            try:
+                ticks = coroutine.send(None)
+            except StopIteration:
+                continue
+            finally:
+                profiler.add_call(coroutine.__qualname__, started_at, clock() - started_at)
+            self.spawn(coroutine, ticks or 1)
+
+    def count_coroutines(self):
+        '''Return numbers of scheduled coroutines by their function.'''
+
+        return collections.Counter(coroutine.__qualname__ for _, _, coroutine in self._queue)
+
+    def close(self):
+        '''Close every scheduled coroutine and empty the queue.'''
+
+        for _, _, coroutine in self._queue:
+            coroutine.close()
+        self._queue.clear()
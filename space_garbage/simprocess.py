@@ -0,0 +1,229 @@
+'''Split mode: the world is simulated in a child process, the terminal process only reads input and renders.
+
+Processes talk through a block of shared memory:
+
+    offset 0   input_seq u32, input_code u8, quit u8   written by the render process
+    offset 8   input_ack u32, beeps u32, front u8      written by the simulation process
+    offset 20  two frame slots: seq u32, symbols, attribute codes, a byte per cell
+
+The simulation draws frames on a HeadlessCanvas and publishes every frame to the
+slot, that is not the front one, then makes it the front. Slot seq is odd while
+the slot is written and grows with every frame, so a reader drops frames it copied in the middle of a write.
+'''
+
+import argparse
+import curses
+import multiprocessing
+import struct
+import time
+from multiprocessing import shared_memory
+
+from space_garbage.common import IDLE_CONTROLS, decode_controls, encode_controls, read_controls
+from space_garbage.headless import HeadlessCanvas
+from space_garbage.render import FrameBuffer, draw_snapshot
+
+
+RENDER_STRUCT = struct.Struct('<IBB')
+RENDER_OFFSET = 0
+SIMULATION_STRUCT = struct.Struct('<IIB')
+SIMULATION_OFFSET = 8
+SLOT_SEQ_STRUCT = struct.Struct('<I')
+SLOTS_OFFSET = 20
+RENDER_POLL_DELAY = 1 / 60
+STOP_TIMEOUT = 2
+
+
+class SimulationStopped(Exception):
+    pass
+
+
+class SharedFrames:
+    '''Double-buffered frames and player input in a shared memory block.'''
+
+    def __init__(self, memory, rows, columns):
+        self.memory = memory
+        self.rows = rows
+        self.columns = columns
+        self.cells = rows * columns
+        self.slot_size = SLOT_SEQ_STRUCT.size + 2 * self.cells
+
+        self._input_seq = 0
+        self._consumed_seq = 0
+        self._pending_controls = IDLE_CONTROLS
+        self._beeps = 0
+        self._front = 0
+        self._published = 0
+
+    @classmethod
+    def create(cls, rows, columns):
+        size = SLOTS_OFFSET + 2 * (SLOT_SEQ_STRUCT.size + 2 * rows * columns)
+        return cls(shared_memory.SharedMemory(create=True, size=size), rows, columns)
+
+    @classmethod
+    def attach(cls, name, rows, columns):
+        return cls(shared_memory.SharedMemory(name=name), rows, columns)
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def close(self, unlink=False):
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+    # Render process side
+
+    def send_controls(self, controls):
+        '''Pass controls to the simulation, merge them with ones it has not taken yet.'''
+
+        input_ack, _, _ = SIMULATION_STRUCT.unpack_from(self.memory.buf, SIMULATION_OFFSET)
+        if input_ack != self._input_seq:
+            pending_rows, pending_columns, pending_space = self._pending_controls
+            rows_direction, columns_direction, space_pressed = controls
+            controls = (
+                rows_direction or pending_rows,
+                columns_direction or pending_columns,
+                space_pressed or pending_space,
+            )
+        elif controls == IDLE_CONTROLS:
+            return
+
+        self._pending_controls = controls
+        self._input_seq += 1
+        RENDER_STRUCT.pack_into(self.memory.buf, RENDER_OFFSET, self._input_seq, encode_controls(*controls), 0)
+
+    def request_stop(self):
+        RENDER_STRUCT.pack_into(self.memory.buf, RENDER_OFFSET, self._input_seq, 0, 1)
+
+    def read_frame(self, last_seq=0):
+        '''Return (seq, symbols, attrs) of the front frame, None if it is not newer than last_seq or torn.
+
+        Seq is 0 until the first frame is published.
+        '''
+
+        _, _, front = SIMULATION_STRUCT.unpack_from(self.memory.buf, SIMULATION_OFFSET)
+        offset = SLOTS_OFFSET + front * self.slot_size
+        seq, = SLOT_SEQ_STRUCT.unpack_from(self.memory.buf, offset)
+        if seq % 2 or seq == last_seq:
+            return None
+
+        data_offset = offset + SLOT_SEQ_STRUCT.size
+        symbols = bytes(self.memory.buf[data_offset:data_offset + self.cells])
+        attrs = bytes(self.memory.buf[data_offset + self.cells:data_offset + 2 * self.cells])
+        if SLOT_SEQ_STRUCT.unpack_from(self.memory.buf, offset)[0] != seq:
+            return None
+        return seq, symbols, attrs
+
+    def read_beeps(self):
+        _, beeps, _ = SIMULATION_STRUCT.unpack_from(self.memory.buf, SIMULATION_OFFSET)
+        return beeps
+
+    # Simulation process side
+
+    def receive_controls(self):
+        '''Return controls sent since the previous call. Raises SimulationStopped on request.'''
+
+        input_seq, input_code, stop = RENDER_STRUCT.unpack_from(self.memory.buf, RENDER_OFFSET)
+        if stop:
+            raise SimulationStopped()
+        if input_seq == self._consumed_seq:
+            return IDLE_CONTROLS
+
+        self._consumed_seq = input_seq
+        self._write_simulation_state()
+        return decode_controls(input_code)
+
+    def beep(self):
+        self._beeps += 1
+        self._write_simulation_state()
+
+    def publish(self, symbols, attrs):
+        '''Write the frame to the back slot and swap slots.'''
+
+        back = 1 - self._front
+        offset = SLOTS_OFFSET + back * self.slot_size
+        data_offset = offset + SLOT_SEQ_STRUCT.size
+
+        SLOT_SEQ_STRUCT.pack_into(self.memory.buf, offset, 2 * self._published + 1)
+        self.memory.buf[data_offset:data_offset + self.cells] = symbols
+        self.memory.buf[data_offset + self.cells:data_offset + 2 * self.cells] = attrs
+        self._published += 1
+        SLOT_SEQ_STRUCT.pack_into(self.memory.buf, offset, 2 * self._published)
+
+        self._front = back
+        self._write_simulation_state()
+
+    def _write_simulation_state(self):
+        SIMULATION_STRUCT.pack_into(self.memory.buf, SIMULATION_OFFSET, self._consumed_seq, self._beeps, self._front)
+
+
+class SharedCanvas(HeadlessCanvas):
+    '''In-memory canvas of the simulation process, refresh() publishes the frame to the render process.'''
+
+    def __init__(self, frames):
+        super().__init__(frames.rows, frames.columns)
+        self.frames = frames
+
+    def refresh(self):
+        super().refresh()
+        self.frames.publish(*self.snapshot())
+
+    def beep(self):
+        self.frames.beep()
+
+
+def simulate(memory_name, rows, columns, options):
+    '''Entry point of the simulation process.'''
+
+    from space_garbage.main import draw
+
+    # the canvas is not a curses window, sounds go to the render process with canvas.beep()
+    options = argparse.Namespace(**{**vars(options), 'backend': 'shared'})
+    frames = SharedFrames.attach(memory_name, rows, columns)
+    try:
+        draw(SharedCanvas(frames), options, controller=frames.receive_controls)
+    except (SimulationStopped, KeyboardInterrupt):
+        pass
+    finally:
+        frames.close()
+
+
+def run_split(canvas, options):
+    '''Reads input and renders frames of the simulation, that runs in a child process.'''
+
+    screen = FrameBuffer(canvas)
+    screen.nodelay(True)
+    curses.curs_set(False)
+    screen.border()
+    rows, columns = screen.getmaxyx()
+
+    frames = SharedFrames.create(rows, columns)
+    context = multiprocessing.get_context('spawn')
+    process = context.Process(target=simulate, args=(frames.name, rows, columns, options), daemon=True)
+    process.start()
+
+    shown_seq = 0
+    shown_symbols = shown_attrs = None
+    beeps = 0
+    try:
+        while process.is_alive():
+            frames.send_controls(read_controls(screen))
+
+            frame = frames.read_frame(shown_seq)
+            if frame is not None:
+                shown_seq, symbols, attrs = frame
+                draw_snapshot(screen, symbols, attrs, columns, shown_symbols, shown_attrs)
+                shown_symbols, shown_attrs = symbols, attrs
+                screen.refresh()
+
+            if frames.read_beeps() != beeps:
+                beeps = frames.read_beeps()
+                curses.beep()
+            time.sleep(RENDER_POLL_DELAY)
+    finally:
+        frames.request_stop()
+        process.join(STOP_TIMEOUT)
+        if process.is_alive():
+            process.terminate()
+        frames.close(unlink=True)
@@ -0,0 +1,284 @@
+'''Spectator mode: the game streams its frames over TCP, spectator clients draw them in their own terminals.
+
+Stream format: a header with frame size, then frames, every one is a length
+prefixed list of delta records against the previous frame sent to the client.
+A record skips unchanged cells and then fills a run of cells with one symbol
+and attribute code. A client, that does not read fast enough, misses frames
+until its write buffer drains below the high-water mark.
+'''
+
+import argparse
+import asyncio
+import curses
+import select
+import socket
+import struct
+import threading
+
+from space_garbage.render import FrameBuffer, draw_snapshot
+
+
+MAGIC = b'SGSP'
+HEADER_STRUCT = struct.Struct('<4sHH')  # magic, rows, columns
+LENGTH_STRUCT = struct.Struct('<I')
+RECORD_STRUCT = struct.Struct('<HHBB')  # cells to skip, run length, symbol, attribute code
+MAX_RECORD_FIELD = 0xFFFF
+WRITE_HIGH_WATER = 64 * 1024
+DEFAULT_HOST = '127.0.0.1'
+QUIT_KEY_CODES = (ord('q'), ord('Q'))
+CLIENT_POLL_DELAY = 0.05
+RECEIVE_SIZE = 65536
+
+
+class StreamFormatError(Exception):
+    pass
+
+
+def parse_address(address):
+    '''Parse HOST:PORT, HOST may be omitted. Suits as an argparse type.'''
+
+    host, _, port = address.rpartition(':')
+    try:
+        return host or DEFAULT_HOST, int(port)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'expected HOST:PORT, got {address!r}')
+
+
+def encode_delta(old_symbols, old_attrs, symbols, attrs, columns):
+    '''Return records, that turn the old frame into the new one.'''
+
+    records = bytearray()
+    skip = 0
+    for start in range(0, len(symbols), columns):
+        end = start + columns
+        if symbols[start:end] == old_symbols[start:end] and attrs[start:end] == old_attrs[start:end]:
+            skip += columns
+            continue
+
+        cell = start
+        while cell < end:
+            symbol, attr = symbols[cell], attrs[cell]
+            if symbol == old_symbols[cell] and attr == old_attrs[cell]:
+                skip += 1
+                cell += 1
+                continue
+
+            while skip > MAX_RECORD_FIELD:
+                records += RECORD_STRUCT.pack(MAX_RECORD_FIELD, 0, 0, 0)
+                skip -= MAX_RECORD_FIELD
+
+            run_end = cell + 1
+            while run_end < end and run_end - cell < MAX_RECORD_FIELD and \
+                    symbols[run_end] == symbol and attrs[run_end] == attr:
+                run_end += 1
+            records += RECORD_STRUCT.pack(skip, run_end - cell, symbol, attr)
+            skip = 0
+            cell = run_end
+    return bytes(records)
+
+
+def apply_delta(symbols, attrs, records):
+    '''Apply delta records to the frame, given as a pair of bytearrays.'''
+
+    if len(records) % RECORD_STRUCT.size:
+        raise StreamFormatError(f'delta of {len(records)} bytes is not made of whole records')
+
+    cell = 0
+    for skip, run, symbol, attr in RECORD_STRUCT.iter_unpack(records):
+        cell += skip
+        if cell + run > len(symbols):
+            raise StreamFormatError('delta runs past the end of the frame')
+        symbols[cell:cell + run] = bytes((symbol,)) * run
+        attrs[cell:cell + run] = bytes((attr,)) * run
+        cell += run
+
+
+class _Spectator:
+
+    def __init__(self, writer, cells):
+        self.writer = writer
+        self.symbols = b' ' * cells
+        self.attrs = bytes(cells)
+
+
+class SpectatorServer:
+    '''TCP server, that broadcasts frames to spectators from a background thread with its own event loop.
+
+    publish() may be called from the game thread after every frame, frames
+    published while the loop is busy are coalesced into the latest one.
+    '''
+
+    def __init__(self, host, port, rows, columns, high_water=WRITE_HIGH_WATER):
+        self.host = host
+        self.port = port
+        self.rows = rows
+        self.columns = columns
+        self.high_water = high_water
+
+        self.frames_sent = 0
+        self.frames_skipped = 0
+
+        self._spectators = set()
+        self._latest_frame = None
+        self._broadcast_scheduled = False
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._started = threading.Event()
+        self._start_error = None
+
+    def start(self):
+        '''Start the server thread, raises OSError if the address can`t be bound.'''
+
+        self._thread = threading.Thread(target=self._run, name='spectator-server', daemon=True)
+        self._thread.start()
+        self._started.wait()
+        if self._start_error is not None:
+            raise self._start_error
+
+    @property
+    def has_spectators(self):
+        return bool(self._spectators)
+
+    def publish(self, symbols, attrs):
+        '''Send the frame snapshot to all spectators.'''
+
+        self._latest_frame = symbols, attrs
+        if not self._broadcast_scheduled:
+            self._broadcast_scheduled = True
+            self._loop.call_soon_threadsafe(self._broadcast)
+
+    def close(self):
+        if self._loop is not None and self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle_spectator, self.host, self.port))
+        except OSError as error:
+            self._start_error = error
+            self._started.set()
+            self._loop.close()
+            return
+
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            for spectator in self._spectators:
+                spectator.writer.transport.abort()  # handlers get end of stream and finish
+            handlers = asyncio.all_tasks(self._loop)
+            self._loop.run_until_complete(asyncio.gather(*handlers, return_exceptions=True))
+            self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+
+    async def _handle_spectator(self, reader, writer):
+        spectator = _Spectator(writer, self.rows * self.columns)
+        writer.write(HEADER_STRUCT.pack(MAGIC, self.rows, self.columns))
+        self._spectators.add(spectator)
+        if self._latest_frame is not None:
+            self._send(spectator, *self._latest_frame)
+        try:
+            while await reader.read(RECEIVE_SIZE):
+                pass  # spectators send nothing, wait till they disconnect
+        except ConnectionError:
+            pass
+        finally:
+            self._spectators.discard(spectator)
+            writer.close()
+
+    def _broadcast(self):
+        self._broadcast_scheduled = False
+        symbols, attrs = self._latest_frame
+        for spectator in self._spectators:
+            if spectator.writer.transport.get_write_buffer_size() > self.high_water:
+                self.frames_skipped += 1
+                continue
+            self._send(spectator, symbols, attrs)
+
+    def _send(self, spectator, symbols, attrs):
+        if spectator.writer.is_closing():
+            return
+
+        records = encode_delta(spectator.symbols, spectator.attrs, symbols, attrs, self.columns)
+        spectator.writer.write(LENGTH_STRUCT.pack(len(records)) + records)
+        spectator.symbols, spectator.attrs = symbols, attrs
+        self.frames_sent += 1
+
+
+class StreamReader:
+    '''Decodes the stream of a spectator server into frames.'''
+
+    def __init__(self):
+        self.rows = self.columns = None
+        self.symbols = self.attrs = None
+        self._data = bytearray()
+
+    def feed(self, data):
+        '''Consume received bytes, return True if the frame has changed.'''
+
+        self._data += data
+        changed = False
+        if self.rows is None:
+            if len(self._data) < HEADER_STRUCT.size:
+                return False
+            magic, self.rows, self.columns = HEADER_STRUCT.unpack_from(self._data)
+            if magic != MAGIC:
+                raise StreamFormatError('not a space garbage spectator stream')
+            del self._data[:HEADER_STRUCT.size]
+            self.symbols = bytearray(b' ' * (self.rows * self.columns))
+            self.attrs = bytearray(self.rows * self.columns)
+
+        while len(self._data) >= LENGTH_STRUCT.size:
+            length, = LENGTH_STRUCT.unpack_from(self._data)
+            end = LENGTH_STRUCT.size + length
+            if len(self._data) < end:
+                break
+            apply_delta(self.symbols, self.attrs, bytes(self._data[LENGTH_STRUCT.size:end]))
+            del self._data[:end]
+            changed = True
+        return changed
+
+
+def watch(canvas, host, port):
+    '''Draws frames of a spectator server on the canvas till the server stops or Q is pressed.'''
+
+    screen = FrameBuffer(canvas)
+    screen.nodelay(True)
+    curses.curs_set(False)
+    stream = StreamReader()
+    shown_symbols = shown_attrs = None
+
+    with socket.create_connection((host, port)) as connection:
+        while screen.getch() not in QUIT_KEY_CODES:
+            if not select.select([connection], [], [], CLIENT_POLL_DELAY)[0]:
+                continue
+            data = connection.recv(RECEIVE_SIZE)
+            if not data:
+                break
+            if not stream.feed(data):
+                continue
+
+            symbols, attrs = bytes(stream.symbols), bytes(stream.attrs)
+            draw_snapshot(screen, symbols, attrs, stream.columns, shown_symbols, shown_attrs)
+            shown_symbols, shown_attrs = symbols, attrs
+            screen.refresh()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Watch a Space Garbage game served with --serve')
+    parser.add_argument('address', type=parse_address, help='HOST:PORT of the game')
+    options = parser.parse_args()
+
+    host, port = options.address
+    curses.update_lines_cols()
+    curses.wrapper(watch, host, port)
+
+
+if __name__ == '__main__':
+    main()
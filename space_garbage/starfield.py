@@ -0,0 +1,68 @@
+'''Background stars, blinking all together in one component.'''
+
+import array
+import curses
+import random
+
+
+# brightness of a phase and range of ticks it lasts, stars go through phases in a loop
+BLINK_PHASES = (
+    (curses.A_DIM, 10, 20),
+    (curses.A_NORMAL, 3, 6),
+    (curses.A_BOLD, 5, 10),
+    (curses.A_NORMAL, 3, 6),
+)
+WHEEL_SIZE = max(max_ticks for _, _, max_ticks in BLINK_PHASES) + 1
+
+
+class Starfield:
+    '''Stars, stored in compact parallel arrays of positions, symbols and phases.
+
+    Instead of a countdown per star, stars wait in a timer wheel — a slot per tick
+    holding indexes of stars, that change brightness on that tick. So update()
+    touches only the stars blinking right now, whatever the size of the field.
+    '''
+
+    def __init__(self, rng=random):
+        self.rng = rng
+        self.rows = array.array('H')
+        self.columns = array.array('H')
+        self.symbols = array.array('B')
+        self.phases = array.array('B')
+
+        self._wheel = [array.array('I') for _ in range(WHEEL_SIZE)]
+        self._tick = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, row, column, symbol='*'):
+        '''Add a star, it lights up on the next update.'''
+
+        index = len(self.rows)
+        self.rows.append(row)
+        self.columns.append(column)
+        self.symbols.append(ord(symbol))
+        self.phases.append(len(BLINK_PHASES) - 1)
+        self._wheel[self._tick % WHEEL_SIZE].append(index)
+
+    def update(self, canvas):
+        '''Move stars, which should blink on current tick, to their next phase and draw them.'''
+
+        wheel, tick = self._wheel, self._tick
+        slot = tick % WHEEL_SIZE
+        due_stars, wheel[slot] = wheel[slot], array.array('I')
+
+        rows, columns, symbols, phases = self.rows, self.columns, self.symbols, self.phases
+        phases_number = len(BLINK_PHASES)
+        randint = self.rng.randint
+
+        for index in due_stars:
+            phase = (phases[index] + 1) % phases_number
+            phases[index] = phase
+            attr, min_ticks, max_ticks = BLINK_PHASES[phase]
+
+            canvas.addstr(rows[index], columns[index], chr(symbols[index]), attr)
+            wheel[(tick + randint(min_ticks, max_ticks)) % WHEEL_SIZE].append(index)
+
+        self._tick = tick + 1
@@ -1,4 +1,7 @@
-game_over = '''\
+from space_garbage.common import Sprite
+
+
+game_over = Sprite('''\
    _____                         ____                 
   / ____|                       / __ \                
  | |  __  __ _ _ __ ___   ___  | |  | |_   _____ _ __ 
@@ -6,7 +9,7 @@ game_over = '''\
  | |__| | (_| | | | | | |  __/ | |__| |\ V /  __/ |   
   \_____|\__,_|_| |_| |_|\___|  \____/  \_/ \___|_|   
                                                       
-'''
+''')
 
 
 PHRASES = {
@@ -0,0 +1,253 @@
+'''Years of the game: how often garbage appears, which garbage and what the caption says.
+
+By default the timeline is built from get_garbage_delay_tics() and PHRASES.
+It can be loaded from a CSV, JSON lines or JSON file with rows sorted by year:
+
+    year,garbage_delay_ticks,debris_count,phrase,duck,hubble,lamp,trash_small,trash_medium,trash_large
+    1961,20,,Gagarin flew!,1,1,1,1,1,1
+    1990,,5000,,0,3,1,5,5,5
+
+Every column except year is optional. garbage_delay_ticks is taken as is,
+debris_count, a number of tracked objects on the orbit, is turned into the
+delay otherwise, and with none of them the delay of the previous row stays.
+0 in either of them means no garbage from that year on. Sprite columns are
+relative weights of garbage kinds, they stay from the previous row too, a
+kind with weight 0 doesn`t appear. Negative numbers are errors. JSON lines
+rows and objects of a JSON array have the same keys, with sprite weights in a
+"weights" object. The file is checked in one pass on load and then read again
+as the game reaches the years, JSON arrays are the only ones kept in memory
+whole.
+'''
+
+import csv
+import json
+import math
+
+from space_garbage.common import get_garbage_delay_tics
+from space_garbage.garbage import duck, hubble, lamp, trash_large, trash_medium, trash_small
+from space_garbage.text import PHRASES
+
+
+FIRST_YEAR = 1957
+LAST_SCRIPTED_YEAR = max(PHRASES)
+GARBAGE_SPRITES = {
+    'duck': duck,
+    'hubble': hubble,
+    'lamp': lamp,
+    'trash_small': trash_small,
+    'trash_medium': trash_medium,
+    'trash_large': trash_large,
+}
+REFERENCE_DEBRIS_COUNT = 20000  # a piece of garbage every REFERENCE_DELAY_TICKS with that much debris
+REFERENCE_DELAY_TICKS = 2
+JSON_LINES_SUFFIXES = ('.jsonl', '.ndjson')
+JSON_SUFFIX = '.json'
+
+
+class TimelineFormatError(Exception):
+    pass
+
+
+class YearEntry:
+    '''Everything the game needs to know about a year, computed once.'''
+
+    __slots__ = ('year', 'garbage_delay_ticks', 'caption', 'sprites', 'cum_weights')
+
+    def __init__(self, year, garbage_delay_ticks, caption, sprites, cum_weights=None):
+        self.year = year
+        self.garbage_delay_ticks = garbage_delay_ticks
+        self.caption = caption
+        self.sprites = sprites
+        self.cum_weights = cum_weights
+
+    def choose_sprite(self, rng):
+        if self.cum_weights is None:
+            return rng.choice(self.sprites)
+        return rng.choices(self.sprites, cum_weights=self.cum_weights)[0]
+
+
+class _Row:
+
+    __slots__ = ('year', 'garbage_delay_ticks', 'phrase', 'sprites', 'cum_weights')
+
+    def __init__(self, year, garbage_delay_ticks=None, phrase=None,
+                 sprites=tuple(GARBAGE_SPRITES.values()), cum_weights=None):
+        self.year = year
+        self.garbage_delay_ticks = garbage_delay_ticks
+        self.phrase = phrase
+        self.sprites = sprites
+        self.cum_weights = cum_weights
+
+
+class Timeline:
+    '''Streams rows and answers what is going on in a year.
+
+    Years must be asked in not decreasing order, as the game lives them,
+    so only the current row and the next one are kept in memory.
+    '''
+
+    def __init__(self, rows, source=None):
+        self._rows = iter(rows)
+        self._source = source
+        self._row = _Row(-math.inf)
+        self._next_row = next(self._rows, None)
+        self._entry = None
+
+    @classmethod
+    def from_file(cls, path, check=True):
+        '''Load the timeline from a file, raise TimelineFormatError if any row of it is bad.
+
+        With check=False rows are only read as the game reaches them, for a file checked with check_file() before.
+        '''
+
+        source = open(path, newline='')
+        try:
+            if check:
+                _check_rows(path, source)
+                source.seek(0)
+            rows = _fill_rows(_parse_file(path, source))
+        except Exception:
+            source.close()
+            raise
+        return cls(rows, source)
+
+    @staticmethod
+    def check_file(path):
+        '''Read the timeline file through, raise TimelineFormatError if any row of it is bad.'''
+
+        with open(path, newline='') as source:
+            _check_rows(path, source)
+
+    def get(self, year):
+        '''Return YearEntry of the year.'''
+
+        if self._entry is not None and self._entry.year == year:
+            return self._entry
+        if self._entry is not None and year < self._entry.year:
+            raise ValueError(f'year {year} is before year {self._entry.year} asked already')
+
+        while self._next_row is not None and self._next_row.year <= year:
+            self._row = self._next_row
+            self._next_row = next(self._rows, None)
+            if self._next_row is not None and self._next_row.year <= self._row.year:
+                raise TimelineFormatError(f'year {self._next_row.year} goes after year {self._row.year}')
+
+        row = self._row
+        caption = f'Year: {year}'
+        if row.year == year and row.phrase:
+            caption += f', {row.phrase}'
+        self._entry = YearEntry(year, row.garbage_delay_ticks, caption, row.sprites, row.cum_weights)
+        return self._entry
+
+    def close(self):
+        if self._source is not None:
+            self._source.close()
+
+
+def get_default_rows():
+    '''Yield rows of the game story, made of get_garbage_delay_tics() and PHRASES.'''
+
+    for year in range(FIRST_YEAR, LAST_SCRIPTED_YEAR + 1):
+        yield _Row(year, get_garbage_delay_tics(year), PHRASES.get(year))
+
+
+def get_delay_by_debris(debris_count):
+    '''Return ticks between garbage pieces for a number of tracked objects on the orbit.'''
+
+    if debris_count <= 0:
+        return None
+    return max(1, round(REFERENCE_DELAY_TICKS * math.sqrt(REFERENCE_DEBRIS_COUNT / debris_count)))
+
+
+def _check_rows(path, source):
+    for _ in _fill_rows(_parse_file(path, source)):
+        pass
+
+
+def _parse_file(path, source):
+    if path.endswith(JSON_LINES_SUFFIXES):
+        return _parse_json_lines(source)
+    if path.endswith(JSON_SUFFIX):
+        return _parse_json_array(source)
+    return _parse_csv(source)
+
+
+def _parse_csv(source):
+    for line_number, record in enumerate(csv.DictReader(source), start=2):
+        weights = {name: record[name] for name in GARBAGE_SPRITES if record.get(name)}
+        yield f'line {line_number}', record, weights
+
+
+def _parse_json_lines(source):
+    for line_number, line in enumerate(source, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            raise TimelineFormatError(f'line {line_number}: {error}')
+        yield _get_json_row(f'line {line_number}', record)
+
+
+def _parse_json_array(source):
+    try:
+        records = json.load(source)
+    except ValueError as error:
+        raise TimelineFormatError(f'bad JSON, {error}')
+    if not isinstance(records, list):
+        raise TimelineFormatError('JSON timeline should be an array of objects')
+
+    for index, record in enumerate(records):
+        yield _get_json_row(f'item {index}', record)
+
+
+def _get_json_row(location, record):
+    if not isinstance(record, dict):
+        raise TimelineFormatError(f'{location}: expected an object, got {record!r}')
+    weights = record.get('weights') or {}
+    if not isinstance(weights, dict):
+        raise TimelineFormatError(f'{location}: weights should be an object, got {weights!r}')
+    return location, record, weights
+
+
+def _fill_rows(records):
+    previous = _Row(-math.inf)
+    for location, record, weights in records:
+        try:
+            row = _Row(int(record['year']), previous.garbage_delay_ticks, record.get('phrase') or None,
+                       previous.sprites, previous.cum_weights)
+
+            if record.get('garbage_delay_ticks') not in (None, ''):
+                garbage_delay_ticks = _get_not_negative('garbage_delay_ticks', int(record['garbage_delay_ticks']))
+                row.garbage_delay_ticks = garbage_delay_ticks or None
+            elif record.get('debris_count') not in (None, ''):
+                debris_count = _get_not_negative('debris_count', float(record['debris_count']))
+                row.garbage_delay_ticks = get_delay_by_debris(debris_count)
+
+            if weights:
+                weights = {
+                    name: _get_not_negative(name, float(weights[name]))
+                    for name in GARBAGE_SPRITES if name in weights
+                }
+                names = [name for name in GARBAGE_SPRITES if weights.get(name, 0) > 0]
+                if not names:
+                    raise ValueError('all sprite weights are zero')
+                row.sprites = tuple(GARBAGE_SPRITES[name] for name in names)
+                cum_weights, total = [], 0
+                for name in names:
+                    total += weights[name]
+                    cum_weights.append(total)
+                row.cum_weights = tuple(cum_weights)
+        except (KeyError, ValueError, TypeError) as error:
+            raise TimelineFormatError(f'{location}: bad row, {error!r}')
+        if row.year <= previous.year:
+            raise TimelineFormatError(f'{location}: year {row.year} goes after year {previous.year}')
+
+        yield row
+        previous = row
+
+
+def _get_not_negative(name, value):
+    if value < 0:
+        raise ValueError(f'{name} is negative: {value}')
+    return value
@@ -0,0 +1,104 @@
+'''Game world larger than the terminal, seen through a camera.'''
+
+import itertools
+import random
+
+from space_garbage.starfield import Starfield
+
+
+CHUNK_ROWS = 16
+CHUNK_COLUMNS = 32
+NEAR_CHUNKS_MARGIN = 1  # chunks around the viewport, where entities still live in detail
+
+
+class Camera:
+    '''Viewport of the screen size over the world, that follows the ship.
+
+    The world is split into chunks. Chunks under the viewport and a margin of
+    chunks around it are near: entities there move in detail and draw
+    themselves, entities in far chunks only move, at a coarse rate.
+    '''
+
+    def __init__(self, rows, columns, world_rows, world_columns,
+                 chunk_rows=CHUNK_ROWS, chunk_columns=CHUNK_COLUMNS, margin=NEAR_CHUNKS_MARGIN):
+        self.rows = min(rows, world_rows)
+        self.columns = min(columns, world_columns)
+        self.world_rows = world_rows
+        self.world_columns = world_columns
+        self.chunk_rows = chunk_rows
+        self.chunk_columns = chunk_columns
+        self.margin = margin
+
+        self.row = self.column = 0
+        self._near_rows = self._near_columns = range(0)
+        self.follow(world_rows / 2, world_columns / 2)
+
+    def follow(self, row, column):
+        '''Center the viewport on a world position, but keep it inside the world.'''
+
+        self.row = min(max(round(row - self.rows / 2), 0), self.world_rows - self.rows)
+        self.column = min(max(round(column - self.columns / 2), 0), self.world_columns - self.columns)
+
+        self._near_rows = range(
+            self.row // self.chunk_rows - self.margin,
+            (self.row + self.rows - 1) // self.chunk_rows + self.margin + 1,
+        )
+        self._near_columns = range(
+            self.column // self.chunk_columns - self.margin,
+            (self.column + self.columns - 1) // self.chunk_columns + self.margin + 1,
+        )
+
+    def is_near(self, row, column):
+        '''Check if the world position is in a near chunk.'''
+
+        return int(row) // self.chunk_rows in self._near_rows and \
+            int(column) // self.chunk_columns in self._near_columns
+
+    def get_chunk(self, row, column):
+        return int(row) // self.chunk_rows, int(column) // self.chunk_columns
+
+    def get_near_chunks(self):
+        return itertools.product(self._near_rows, self._near_columns)
+
+    def show(self, world, screen, hud=None):
+        '''Copy the viewport of the world canvas to the screen, put non-blank cells of the hud over it.'''
+
+        first_column, last_column = self.column, self.column + self.columns
+        for screen_row in range(self.rows):
+            world_row = self.row + screen_row
+            screen.blit_row(screen_row, world.lines[world_row][first_column:last_column],
+                            world.attrs[world_row][first_column:last_column])
+
+        if hud is None:
+            return
+        for row, line in enumerate(hud.lines[:self.rows]):
+            if ''.join(line).isspace():
+                continue
+            attrs = hud.attrs[row]
+            for column, symbol in enumerate(line[:self.columns]):
+                if symbol != ' ':
+                    screen.addstr(row, column, symbol, attrs[column])
+
+
+class ChunkedStarfield:
+    '''Stars of the world, a Starfield per chunk. Only stars of near chunks blink, the rest stay as they are.'''
+
+    def __init__(self, camera, rng=random):
+        self.camera = camera
+        self.rng = rng
+        self._chunks = {}
+
+    def __len__(self):
+        return sum(len(starfield) for starfield in self._chunks.values())
+
+    def add(self, row, column, symbol='*'):
+        chunk = self.camera.get_chunk(row, column)
+        if chunk not in self._chunks:
+            self._chunks[chunk] = Starfield(self.rng)
+        self._chunks[chunk].add(row, column, symbol)
+
+    def update(self, canvas):
+        for chunk in self.camera.get_near_chunks():
+            starfield = self._chunks.get(chunk)
+            if starfield is not None:
+                starfield.update(canvas)